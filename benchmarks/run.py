@@ -0,0 +1,396 @@
+"""Renderer benchmark suite.
+
+Synthesizes configs and assets for a set of scenarios, renders each one in
+its own process and reports wall time, peak memory and per-stage times as
+JSON, so results can be compared across commits::
+
+    python benchmarks/run.py -o before.json
+    git checkout my-branch
+    python benchmarks/run.py -o after.json --compare before.json
+
+Generated assets are kept in the work directory and reused between runs.
+
+The import time of the config validation path (``drawtool validate``) is
+measured too and checked against IMPORT_BUDGET_MS; it must not import Pillow.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from PIL import Image, ImageDraw
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+# Bump when scenarios change, so results from different definitions are not compared
+SUITE_VERSION = 2
+
+# Scenario sizes: (default, --quick)
+SIZES: Dict[str, Dict[str, int]] = {
+    "default": {"small_images": 400, "huge_px": 6000, "labels": 600, "glow_labels": 150, "layers": 40,
+                "photo_px": 3000},
+    "quick": {"small_images": 80, "huge_px": 2000, "labels": 120, "glow_labels": 30, "layers": 10,
+              "photo_px": 1200},
+}
+
+
+# Best-of-IMPORT_RUNS import time (ms, in a fresh interpreter) allowed for the validation path
+IMPORT_BUDGET_MS = 50.0
+IMPORT_RUNS = 5
+
+# Import paths measured: name -> statement; "validate" is held to the budget
+IMPORTS: Dict[str, str] = {
+    "validate": "from drawtool import load_config, validate_config",
+    "cli": "import drawtool.cli",
+    "render": "from drawtool import FigureRenderer",
+}
+
+
+# ---------- assets ----------
+def make_asset(path: Path, width: int, height: int, seed: int, transparent: bool = False) -> Path:
+    """Deterministic test image: a gradient with random shapes (skipped if it already exists)."""
+    if path.exists():
+        return path
+    rnd = random.Random(seed)
+    img = Image.linear_gradient("L").resize((width, height)).convert("RGBA")
+    img.putalpha(Image.new("L", (width, height), 255))
+    draw = ImageDraw.Draw(img)
+    for _ in range(24):
+        x0, y0 = rnd.randrange(width), rnd.randrange(height)
+        x1, y1 = x0 + rnd.randrange(1, width // 2 + 2), y0 + rnd.randrange(1, height // 2 + 2)
+        color = (rnd.randrange(256), rnd.randrange(256), rnd.randrange(256), 255)
+        if rnd.random() < 0.5:
+            draw.ellipse((x0, y0, x1, y1), fill=color)
+        else:
+            draw.rectangle((x0, y0, x1, y1), fill=color)
+    if transparent:
+        mask = Image.new("L", (width, height), 0)
+        ImageDraw.Draw(mask).ellipse((0, 0, width - 1, height - 1), fill=255)
+        img.putalpha(mask)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.suffix.lower() in (".jpg", ".jpeg"):
+        img.convert("RGB").save(path, quality=90)
+    else:
+        img.save(path)
+    return path
+
+
+# ---------- scenarios ----------
+def scenario_many_small_images(work: Path, size: Dict[str, int]) -> Dict[str, Any]:
+    """Hundreds of small images from a few dozen files, scaled and partly transparent."""
+    rnd = random.Random(1)
+    files = [make_asset(work / "assets" / f"small{i}.png", 160, 120, i, transparent=i % 3 == 0) for i in range(40)]
+    elements = []
+    for i in range(size["small_images"]):
+        elements.append({
+            "type": "image", "id": f"img{i}", "path": files[i % len(files)].name,
+            "x": rnd.randrange(0, 2400), "y": rnd.randrange(0, 1600),
+            "scale": rnd.choice([0.5, 0.75, 1.0, 1.0]), "alpha": rnd.choice([255, 255, 200]),
+        })
+    return _config(work, 2400, 1600, elements)
+
+
+def scenario_few_huge_images(work: Path, size: Dict[str, int]) -> Dict[str, Any]:
+    """A few camera-sized JPEG/PNG images scaled down onto a figure."""
+    px = size["huge_px"]
+    big_jpg = make_asset(work / "assets" / f"huge{px}.jpg", px, px * 2 // 3, 100)
+    big_png = make_asset(work / "assets" / f"huge{px}.png", px, px * 2 // 3, 101)
+    elements = [
+        {"type": "image", "id": "jpg_full", "path": big_jpg.name, "x": 0, "y": 0, "scale": 2400 / px / 2},
+        {"type": "image", "id": "png_full", "path": big_png.name, "x": 1200, "y": 0, "scale": 2400 / px / 2},
+        {"type": "image", "id": "jpg_rot", "path": big_jpg.name, "x": 600, "y": 1000, "scale": 0.1,
+         "rotation": 15, "anchor_h": "center", "anchor_v": "middle"},
+    ]
+    return _config(work, 2400, 1600, elements)
+
+
+def scenario_text_labels(work: Path, size: Dict[str, int]) -> Dict[str, Any]:
+    """Axis-tick style labels: many short, partly repeated strings."""
+    elements = []
+    n = size["labels"]
+    for i in range(n):
+        horizontal = i % 2 == 0
+        elements.append({
+            "type": "text", "id": f"tick{i}", "text": f"{(i // 2) % 50 * 0.5:.1f}",
+            "x": 60 + (i * 23) % 2300 if horizontal else 40,
+            "y": 1560 if horizontal else 40 + (i * 17) % 1500,
+            "font": {"size": 18, "anchor_h": "center" if horizontal else "right", "anchor_v": "top"},
+        })
+    elements.append({"type": "text", "id": "title", "text": "Benchmark figure\nwith two lines",
+                     "x": 1200, "y": 20, "font": {"size": 48, "bold": True, "align": "center",
+                                                  "anchor_h": "center"}})
+    return _config(work, 2400, 1600, elements)
+
+
+def scenario_glow_rotation(work: Path, size: Dict[str, int]) -> Dict[str, Any]:
+    """Glowing, rotated and translucent labels over rotated images."""
+    rnd = random.Random(3)
+    photo = make_asset(work / "assets" / "photo.png", 640, 480, 7)
+    elements: List[Dict[str, Any]] = []
+    for i in range(12):
+        elements.append({"type": "image", "id": f"photo{i}", "path": photo.name,
+                         "x": rnd.randrange(200, 2200), "y": rnd.randrange(200, 1400),
+                         "scale": 0.6, "rotation": rnd.choice([5, -10, 30, 90]), "alpha": 220,
+                         "anchor_h": "center", "anchor_v": "middle"})
+    for i in range(size["glow_labels"]):
+        elements.append({
+            "type": "text", "id": f"glow{i}", "text": f"Label {i}",
+            "x": rnd.randrange(0, 2400), "y": rnd.randrange(0, 1600),
+            "font": {"size": rnd.choice([24, 32, 48]), "color": "#202020", "alpha": rnd.choice([255, 180]),
+                     "rotation": rnd.choice([0, 0, 30, -45, 90]),
+                     "glow": {"color": "#FFFFFF", "radius": rnd.choice([4, 8, 12]), "alpha": 200,
+                              "mode": "gaussian" if i % 4 else "box"}},
+        })
+    return _config(work, 2400, 1600, elements)
+
+
+def scenario_deep_layers(work: Path, size: Dict[str, int]) -> Dict[str, Any]:
+    """Many overlapping layers of translucent images and text."""
+    files = [make_asset(work / "assets" / f"layer{i}.png", 800, 600, 200 + i, transparent=True) for i in range(6)]
+    layers = []
+    for li in range(size["layers"]):
+        layers.append({"id": f"layer{li}", "order": li, "elements": [
+            {"type": "image", "id": f"l{li}_img", "path": files[li % len(files)].name,
+             "x": 200 + li * 37 % 1200, "y": 100 + li * 53 % 800, "scale": 1.0, "alpha": 160},
+            {"type": "text", "id": f"l{li}_text", "text": f"Layer {li}",
+             "x": 220 + li * 37 % 1200, "y": 120 + li * 53 % 800, "font": {"size": 36, "alpha": 200}},
+        ]})
+    return _config(work, 2400, 1600, [], layers=layers)
+
+
+def scenario_transformed_images(work: Path, size: Dict[str, int]) -> Dict[str, Any]:
+    """Photos scaled, rotated and made translucent, some hanging off the canvas edges."""
+    px = size["photo_px"]
+    opaque = make_asset(work / "assets" / f"photo{px}.jpg", px, px * 3 // 4, 300)
+    cutout = make_asset(work / "assets" / f"cutout{px}.png", px, px * 3 // 4, 301, transparent=True)
+    elements: List[Dict[str, Any]] = []
+    for i, (scale, rotation, alpha) in enumerate([(0.4, 0, 255), (0.4, 0, 160), (0.3, 12, 255), (0.3, -30, 200),
+                                                  (0.5, 90, 255), (1.2, 7, 255)]):
+        for j, path in enumerate((opaque, cutout)):
+            elements.append({"type": "image", "id": f"{path.stem}_{i}", "path": path.name,
+                             "x": -300 + i * 500, "y": -200 + j * 1100, "scale": scale * 1200 / px,
+                             "rotation": rotation, "alpha": alpha, "anchor_h": "center", "anchor_v": "middle"})
+    return _config(work, 2400, 1600, elements)
+
+
+def scenario_large_canvas(work: Path, size: Dict[str, int]) -> Dict[str, Any]:
+    """A poster-sized canvas with little content, dominated by canvas creation and PNG encoding."""
+    photo = make_asset(work / "assets" / "photo.png", 640, 480, 7)
+    elements = [{"type": "image", "id": f"p{i}", "path": photo.name, "x": 700 * i, "y": 500 * i} for i in range(8)]
+    return _config(work, 6000, 4000, elements)
+
+
+SCENARIOS: Dict[str, Callable[[Path, Dict[str, int]], Dict[str, Any]]] = {
+    "many_small_images": scenario_many_small_images,
+    "few_huge_images": scenario_few_huge_images,
+    "text_labels": scenario_text_labels,
+    "glow_rotation": scenario_glow_rotation,
+    "deep_layers": scenario_deep_layers,
+    "transformed_images": scenario_transformed_images,
+    "large_canvas": scenario_large_canvas,
+}
+
+
+def _config(work: Path, width: int, height: int, elements: List[Dict[str, Any]],
+            layers: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    cfg: Dict[str, Any] = {
+        "canvas": {"width": width, "height": height, "background": "#FFFFFF"},
+        "assets": {"base_dir": str(work / "assets")},
+        "elements": elements,
+    }
+    if layers is not None:
+        cfg["layers"] = layers
+    return cfg
+
+
+# ---------- measurement ----------
+def run_scenario(name: str, work: Path, repeat: int, quick: bool) -> Dict[str, Any]:
+    """Render one scenario in this process and measure it."""
+    sys.path.insert(0, str(SRC_DIR))
+    from drawtool import FigureRenderer
+
+    cfg = SCENARIOS[name](work, SIZES["quick" if quick else "default"])
+    config_path = work / f"{name}.json"
+    cfg["output"] = {"path": str(work / "out" / f"{name}.png")}
+    with config_path.open("w", encoding="utf-8") as f:
+        json.dump(cfg, f, indent=2)
+
+    renderer = FigureRenderer(config_path)
+    # The first render decodes assets and rasterizes text with cold caches
+    start = time.perf_counter()
+    renderer.render(force=True)
+    cold = time.perf_counter() - start
+
+    warm = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        renderer.render(force=True)
+        warm.append(time.perf_counter() - start)
+
+    renderer.render(force=True, profile=True)
+    profile = renderer.last_profile
+    n_elements = len(cfg["elements"]) + sum(len(layer["elements"]) for layer in cfg.get("layers", []))
+
+    # Pixel data allocated per element by a cold render (decode, transforms, compositing)
+    renderer.asset_cache.clear()
+    renderer.layer_cache.clear()
+    renderer.render(force=True, profile=True)
+    element_bytes = [e["bytes"] for e in renderer.last_profile.elements()] if renderer.last_profile else []
+    return {
+        "elements": n_elements,
+        "canvas": [cfg["canvas"]["width"], cfg["canvas"]["height"]],
+        "cold_s": cold,
+        "warm_min_s": min(warm),
+        "warm_median_s": statistics.median(warm),
+        "peak_rss_mb": _peak_rss_mb(),
+        "element_alloc_mb_max": max(element_bytes, default=0) / 1e6,
+        "element_alloc_mb_mean": statistics.mean(element_bytes) / 1e6 if element_bytes else 0.0,
+        "stages": {k: round(v["seconds"], 6) for k, v in profile.stages().items()} if profile else {},
+    }
+
+
+def measure_import(statement: str, runs: int = IMPORT_RUNS) -> Dict[str, Any]:
+    """Best time of a statement in fresh interpreters, and whether it imported Pillow."""
+    code = (f"import sys, time; sys.path.insert(0, {str(SRC_DIR)!r}); t = time.perf_counter(); {statement}; "
+            "print((time.perf_counter() - t) * 1000, 'PIL' in sys.modules)")
+    times = []
+    pillow = False
+    for _ in range(runs):
+        proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        ms, loaded = proc.stdout.split()
+        times.append(float(ms))
+        pillow = loaded == "True"
+    return {"ms": min(times), "pillow": pillow}
+
+
+def _peak_rss_mb() -> Optional[float]:
+    """Peak resident memory of this process, or None where unsupported."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=Path(__file__).parent, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any]) -> str:
+    """Table of warm/cold time and memory ratios against a baseline result file."""
+    lines = [f"{'scenario':<20} {'warm':>10} {'base':>10} {'ratio':>7} {'cold ratio':>11} {'rss ratio':>10} "
+             f"{'alloc ratio':>12}"]
+    for name, r in results.get("imports", {}).items():
+        b = baseline.get("imports", {}).get(name)
+        if b is not None:
+            lines.append(f"{'import ' + name:<20} {r['ms'] / 1000:10.3f} {b['ms'] / 1000:10.3f} "
+                         f"{r['ms'] / b['ms']:7.2f}")
+    for name, r in results["scenarios"].items():
+        b = baseline.get("scenarios", {}).get(name)
+        if b is None:
+            lines.append(f"{name:<20} {r['warm_min_s']:10.3f} {'-':>10}")
+            continue
+        rss = (f"{r['peak_rss_mb'] / b['peak_rss_mb']:10.2f}"
+               if r.get("peak_rss_mb") and b.get("peak_rss_mb") else f"{'-':>10}")
+        alloc = (f"{r['element_alloc_mb_max'] / b['element_alloc_mb_max']:12.2f}"
+                 if r.get("element_alloc_mb_max") and b.get("element_alloc_mb_max") else f"{'-':>12}")
+        lines.append(f"{name:<20} {r['warm_min_s']:10.3f} {b['warm_min_s']:10.3f} "
+                     f"{r['warm_min_s'] / b['warm_min_s']:7.2f} {r['cold_s'] / b['cold_s']:11.2f} {rss} {alloc}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the drawtool renderer.")
+    parser.add_argument("scenarios", nargs="*", metavar="SCENARIO",
+                        help=f"scenarios to run (default: all): {', '.join(SCENARIOS)}")
+    parser.add_argument("-n", "--repeat", type=int, default=5, help="warm renders per scenario")
+    parser.add_argument("--quick", action="store_true", help="smaller scenarios for a fast smoke run")
+    parser.add_argument("--workdir", type=Path, default=Path(tempfile.gettempdir()) / "drawtool-bench",
+                        help="where generated assets, configs and outputs are kept")
+    parser.add_argument("-o", "--output", type=Path, default=None, help="write results JSON here")
+    parser.add_argument("--compare", type=Path, default=None, metavar="BASELINE",
+                        help="print ratios against a previous results JSON")
+    parser.add_argument("--one", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario: {', '.join(unknown)}")
+
+    work = args.workdir.resolve()
+    if args.one:
+        # Child process: one scenario, result as JSON on stdout
+        print(json.dumps(run_scenario(args.one, work, args.repeat, args.quick)))
+        return 0
+
+    import PIL
+
+    results: Dict[str, Any] = {
+        "suite_version": SUITE_VERSION,
+        "commit": _git_commit(),
+        "quick": args.quick,
+        "repeat": args.repeat,
+        "python": platform.python_version(),
+        "pillow": PIL.__version__,
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "imports": {},
+        "scenarios": {},
+    }
+    status = 0
+    for name, statement in IMPORTS.items():
+        r = results["imports"][name] = measure_import(statement)
+        print(f"{'import ' + name:<20} {r['ms']:7.1f} ms{'  (Pillow)' if r['pillow'] else ''}")
+    check = results["imports"]["validate"]
+    if check["pillow"] or check["ms"] > IMPORT_BUDGET_MS:
+        print(f"import validate: over budget ({check['ms']:.1f} ms of {IMPORT_BUDGET_MS:.0f} ms"
+              f"{', imports Pillow' if check['pillow'] else ''})", file=sys.stderr)
+        status = 1
+
+    for name in args.scenarios or list(SCENARIOS):
+        # Separate process per scenario: independent caches and peak memory
+        cmd = [sys.executable, __file__, "--one", name, "-n", str(args.repeat), "--workdir", str(work)]
+        if args.quick:
+            cmd.append("--quick")
+        proc = subprocess.run(cmd, capture_output=True, text=True)
+        if proc.returncode != 0:
+            print(f"{name}: FAILED\n{proc.stderr}", file=sys.stderr)
+            return 1
+        r = json.loads(proc.stdout.strip().splitlines()[-1])
+        results["scenarios"][name] = r
+        rss = f"{r['peak_rss_mb']:.0f} MB" if r["peak_rss_mb"] is not None else "-"
+        print(f"{name:<20} cold {r['cold_s']:7.3f}s  warm {r['warm_min_s']:7.3f}s  peak {rss}  "
+              f"per element {r['element_alloc_mb_mean']:.1f} MB (max {r['element_alloc_mb_max']:.1f} MB)")
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with args.output.open("w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with args.compare.open("r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("suite_version") != SUITE_VERSION or baseline.get("quick") != args.quick:
+            print("warning: baseline was produced with different scenarios", file=sys.stderr)
+        print(compare(results, baseline))
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
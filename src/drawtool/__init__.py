@@ -1,6 +1,42 @@
 """DrawTool: PowerPoint-like figure builder."""
 
-from drawtool.renderer import FigureRenderer
-from drawtool.defaults import TextDefaults
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
 
-__all__ = ["FigureRenderer", "TextDefaults"]
+# Public names and the modules defining them. They are imported on first
+# access, so tools that only load or validate configs do not import Pillow.
+_EXPORTS = {
+    "FigureRenderer": "drawtool.renderer",
+    "TextDefaults": "drawtool.defaults",
+    "AssetCache": "drawtool.cache",
+    "DiskCache": "drawtool.diskcache",
+    "RenderResult": "drawtool.batch",
+    "render_many": "drawtool.batch",
+    "Watcher": "drawtool.watch",
+    "load_config": "drawtool.validation",
+    "validate_config": "drawtool.validation",
+}
+
+__all__ = list(_EXPORTS)
+
+if TYPE_CHECKING:
+    from drawtool.batch import RenderResult, render_many
+    from drawtool.cache import AssetCache
+    from drawtool.defaults import TextDefaults
+    from drawtool.diskcache import DiskCache
+    from drawtool.renderer import FigureRenderer
+    from drawtool.validation import load_config, validate_config
+    from drawtool.watch import Watcher
+
+
+def __getattr__(name: str) -> Any:
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module 'drawtool' has no attribute {name!r}")
+    value = getattr(import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
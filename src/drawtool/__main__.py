@@ -0,0 +1,5 @@
+import sys
+
+from drawtool.cli import main
+
+sys.exit(main())
@@ -0,0 +1,150 @@
+"""Render many figure configs, optionally across a process pool."""
+
+from __future__ import annotations
+
+import glob
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional
+
+from drawtool.profiling import RenderProfile
+
+if TYPE_CHECKING:
+    from drawtool.renderer import FigureRenderer
+
+
+@dataclass
+class RenderResult:
+    """Outcome of rendering one config."""
+
+    config_path: Path
+    output_path: Optional[Path] = None
+    seconds: float = 0.0
+    error: Optional[str] = None
+    # True if the output was up to date and not re-rendered
+    skipped: bool = False
+    # Why the figure was (re)built, from its build manifest
+    reasons: List[str] = field(default_factory=list)
+    # Stage timings, when rendered with profile=True
+    profile: Optional[RenderProfile] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def expand_config_paths(patterns: Iterable[str | Path]) -> List[Path]:
+    """Expand glob patterns (``**`` allowed) into a de-duplicated list of config paths.
+
+    Plain paths are kept as given, even if they do not exist, so that the
+    failure is reported for that figure.
+    """
+    paths: List[Path] = []
+    seen = set()
+    for pattern in patterns:
+        pattern = str(pattern)
+        if glob.has_magic(pattern):
+            matches = [Path(p) for p in sorted(glob.glob(pattern, recursive=True))]
+        else:
+            matches = [Path(pattern)]
+        for p in matches:
+            key = p.resolve()
+            if key not in seen:
+                seen.add(key)
+                paths.append(p)
+    return paths
+
+
+def render_many(configs: Iterable[str | Path], workers: int | None = None,
+                on_result: Callable[[RenderResult], None] | None = None,
+                force: bool = False, band_height: int | None = None,
+                profile: bool = False, output_options: Dict[str, Any] | None = None,
+                prefetch_workers: int | None = None) -> List[RenderResult]:
+    """Render each config to its configured output path.
+
+    Args:
+        configs: Config paths or glob patterns.
+        workers: Number of worker processes. ``None`` uses the CPU count;
+            ``1`` renders in the calling process.
+        on_result: Called with each result as soon as it finishes.
+        force: Re-render even figures whose outputs are up to date.
+        band_height: Render and write each figure in bands of this many rows
+            (see FigureRenderer.render).
+        profile: Record stage timings into each result's profile.
+        output_options: Output encoding overrides applied to every figure
+            (e.g. ``{"preset": "draft"}``, see FigureRenderer.render).
+        prefetch_workers: Image loading threads per figure (see
+            FigureRenderer.prefetch_workers); ``None`` keeps the default.
+
+    Returns:
+        One RenderResult per config, in input order. A failing config is
+        recorded in its result and does not stop the rest of the batch.
+    """
+    paths = expand_config_paths(configs)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(paths) or 1))
+
+    results: List[Optional[RenderResult]] = [None] * len(paths)
+    if workers == 1:
+        for i, p in enumerate(paths):
+            results[i] = _render_one(p, force, band_height, profile, output_options, prefetch_workers)
+            if on_result:
+                on_result(results[i])
+    else:
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+
+        # Each worker keeps its asset and font caches across the configs it renders
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(_render_one, p, force, band_height, profile, output_options, prefetch_workers): i
+                       for i, p in enumerate(paths)}
+            for fut in as_completed(futures):
+                i = futures[fut]
+                try:
+                    results[i] = fut.result()
+                except Exception as e:
+                    # The worker itself died (e.g. killed for memory)
+                    results[i] = RenderResult(paths[i], error=f"{type(e).__name__}: {e}")
+                if on_result:
+                    on_result(results[i])
+    return [r for r in results if r is not None]
+
+
+def _render_one(config_path: Path, force: bool = False, band_height: int | None = None,
+                profile: bool = False, output_options: Dict[str, Any] | None = None,
+                prefetch_workers: int | None = None) -> RenderResult:
+    # Imported here so that importing this module (e.g. for expand_config_paths) stays free of Pillow
+    from drawtool.renderer import FigureRenderer
+
+    start = time.perf_counter()
+    try:
+        if prefetch_workers is None:
+            renderer = FigureRenderer(config_path)
+        else:
+            renderer = FigureRenderer(config_path, prefetch_workers=prefetch_workers)
+    except Exception as e:
+        return RenderResult(config_path, seconds=time.perf_counter() - start, error=f"{type(e).__name__}: {e}")
+    return render_result(renderer, start, force=force, band_height=band_height, profile=profile,
+                         output_options=output_options)
+
+
+def render_result(renderer: FigureRenderer, start: float | None = None, **render_options: Any) -> RenderResult:
+    """Call renderer.render(**render_options) and record the outcome; errors are caught into the result.
+
+    start is the perf_counter() time the result's seconds are measured from
+    (default: now).
+    """
+    if start is None:
+        start = time.perf_counter()
+    config_path = renderer.config_path
+    try:
+        out = renderer.render(**render_options)
+    except Exception as e:
+        return RenderResult(config_path, seconds=time.perf_counter() - start,
+                            error=f"{type(e).__name__}: {e}", profile=renderer.last_profile)
+    build = renderer.last_build
+    return RenderResult(config_path, output_path=out, seconds=time.perf_counter() - start,
+                        skipped=build is not None and not build.rebuild,
+                        reasons=list(build.reasons) if build else [], profile=renderer.last_profile)
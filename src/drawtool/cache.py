@@ -0,0 +1,115 @@
+"""In-memory cache of decoded and transformed asset images."""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Hashable, Optional, Tuple
+
+from PIL import Image
+
+
+# Default memory budget for the process-wide cache (bytes of pixel data)
+DEFAULT_MAX_BYTES: int = 512 * 1024 * 1024
+
+# Default memory budget for the process-wide layer snapshot cache
+DEFAULT_LAYER_CACHE_BYTES: int = 256 * 1024 * 1024
+
+
+def image_nbytes(img: Image.Image) -> int:
+    """Approximate pixel memory held by an image."""
+    return img.width * img.height * len(img.getbands())
+
+
+def asset_key(path: Path) -> Tuple[str, int, int]:
+    """Identity of an asset file: resolved path, mtime and size.
+
+    Combined with transform parameters this keys cached variants, so editing
+    an asset invalidates them without any explicit bookkeeping.
+    """
+    st = path.stat()
+    return (str(path), st.st_mtime_ns, st.st_size)
+
+
+class AssetCache:
+    """LRU cache of images bounded by a pixel-memory budget.
+
+    Cached images are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Hashable, Image.Image] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Image.Image]:
+        """Return the cached image for key, or None."""
+        with self._lock:
+            img = self._entries.get(key)
+            if img is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return img
+
+    def put(self, key: Hashable, img: Image.Image) -> None:
+        """Store an image, evicting least recently used entries to stay within budget."""
+        size = image_nbytes(img)
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= image_nbytes(self._entries.pop(key))
+            if size > self.max_bytes:
+                return
+            self._entries[key] = img
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, old = self._entries.popitem(last=False)
+                self._bytes -= image_nbytes(old)
+
+    def clear(self) -> None:
+        """Drop all entries and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, int]:
+        """Counters and current size as a dictionary."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+
+# Process-wide cache shared by all renderers unless one is passed explicitly
+_shared_cache = AssetCache()
+
+
+def shared_asset_cache() -> AssetCache:
+    """Return the process-wide asset cache."""
+    return _shared_cache
+
+
+# Canvas snapshots taken between layers, shared by all renderers unless one is passed explicitly
+_shared_layer_cache = AssetCache(DEFAULT_LAYER_CACHE_BYTES)
+
+
+def shared_layer_cache() -> AssetCache:
+    """Return the process-wide layer snapshot cache."""
+    return _shared_layer_cache
@@ -0,0 +1,181 @@
+"""Command line interface: ``drawtool <command> ...``."""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from drawtool.batch import RenderResult, expand_config_paths, render_many
+from drawtool.defaults import OutputDefaults
+from drawtool.diskcache import CACHE_DIR_ENV, DiskCache
+from drawtool.encoding import OUTPUT_FORMATS
+from drawtool.prefetch import PREFETCH_WORKERS
+from drawtool.validation import load_config, validate_config
+from drawtool.watch import WATCH_DEBOUNCE, WATCH_INTERVAL, Watcher
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="drawtool", description="Render figures from JSON configs.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_render = sub.add_parser("render", help="render one or more configs")
+    p_render.add_argument("configs", nargs="+", help="config files or glob patterns (e.g. 'figs/**/*.json')")
+    p_render.add_argument("-j", "--workers", type=int, default=None,
+                          help="worker processes (default: CPU count, 1 = no pool)")
+    p_render.add_argument("-f", "--force", action="store_true", help="re-render figures that are up to date")
+    p_render.add_argument("--band-height", type=int, default=None, metavar="ROWS",
+                          help="render and stream PNGs in bands of ROWS rows to bound memory")
+    p_render.add_argument("--format", choices=list(OUTPUT_FORMATS), default=None,
+                          help="output format (overrides output.format; the output suffix is adjusted)")
+    p_render.add_argument("--preset", choices=list(OutputDefaults.PRESETS), default=None,
+                          help="encoder preset: draft saves fastest, final writes the smallest files")
+    p_render.add_argument("--profile", action="store_true",
+                          help="print time and allocated pixels per stage and the slowest elements")
+    p_render.add_argument("--trace", type=Path, default=None, metavar="DIR",
+                          help="write a Chrome trace (<config>.trace.json) per figure into DIR")
+    p_render.add_argument("--prefetch", type=int, default=None, metavar="N",
+                          help=f"threads decoding images ahead of compositing per figure (0 = off, default: {PREFETCH_WORKERS})")
+    p_render.add_argument("--cache-dir", type=Path, default=None, metavar="DIR",
+                          help=f"on-disk cache of transformed assets shared by workers (default: ${CACHE_DIR_ENV})")
+    p_render.add_argument("-q", "--quiet", action="store_true", help="only report failures")
+    p_render.set_defaults(func=_cmd_render)
+
+    p_watch = sub.add_parser("watch", help="re-render configs whenever they or their images and fonts change")
+    p_watch.add_argument("configs", nargs="+", help="config files or glob patterns (expanded once at start)")
+    p_watch.add_argument("-f", "--force", action="store_true", help="re-render figures that are up to date at start")
+    p_watch.add_argument("--interval", type=float, default=WATCH_INTERVAL, metavar="SECONDS",
+                         help=f"time between checks for changed files (default: {WATCH_INTERVAL})")
+    p_watch.add_argument("--debounce", type=float, default=WATCH_DEBOUNCE, metavar="SECONDS",
+                         help=f"quiet time of changed files before re-rendering (default: {WATCH_DEBOUNCE})")
+    p_watch.add_argument("--format", choices=list(OUTPUT_FORMATS), default=None,
+                         help="output format (overrides output.format; the output suffix is adjusted)")
+    p_watch.add_argument("--preset", choices=list(OutputDefaults.PRESETS), default=None,
+                         help="encoder preset: draft saves fastest, final writes the smallest files")
+    p_watch.add_argument("--profile", action="store_true",
+                         help="print time and allocated pixels per stage and the slowest elements")
+    p_watch.add_argument("--trace", type=Path, default=None, metavar="DIR",
+                         help="write a Chrome trace (<config>.trace.json) per render into DIR")
+    p_watch.add_argument("--prefetch", type=int, default=None, metavar="N",
+                         help=f"threads decoding images ahead of compositing (0 = off, default: {PREFETCH_WORKERS})")
+    p_watch.add_argument("--cache-dir", type=Path, default=None, metavar="DIR",
+                         help=f"on-disk cache of transformed assets (default: ${CACHE_DIR_ENV})")
+    p_watch.add_argument("-q", "--quiet", action="store_true", help="only report failures")
+    p_watch.set_defaults(func=_cmd_watch)
+
+    p_validate = sub.add_parser("validate", help="check configs without rendering them")
+    p_validate.add_argument("configs", nargs="+", help="config files or glob patterns")
+    p_validate.add_argument("-q", "--quiet", action="store_true", help="only report invalid configs")
+    p_validate.set_defaults(func=_cmd_validate)
+
+    p_cache = sub.add_parser("cache", help="inspect or clear the on-disk asset cache")
+    p_cache.add_argument("action", choices=["info", "clear"])
+    p_cache.add_argument("--cache-dir", type=Path, default=None, metavar="DIR",
+                         help=f"cache directory (default: ${CACHE_DIR_ENV})")
+    p_cache.set_defaults(func=_cmd_cache)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+def _cmd_render(args: argparse.Namespace) -> int:
+    if args.cache_dir is not None:
+        # Inherited by worker processes, which open the cache from the environment
+        os.environ[CACHE_DIR_ENV] = str(args.cache_dir)
+
+    output_options = {k: v for k, v in (("format", args.format), ("preset", args.preset)) if v is not None}
+    start = time.perf_counter()
+    results = render_many(args.configs, workers=args.workers, on_result=lambda r: _report(args, r),
+                           force=args.force, band_height=args.band_height,
+                           profile=args.profile or args.trace is not None,
+                           output_options=output_options or None, prefetch_workers=args.prefetch)
+    failed = sum(1 for r in results if not r.ok)
+    skipped = sum(1 for r in results if r.skipped)
+    if not results:
+        print("no configs matched", file=sys.stderr)
+        return 2
+    print(f"{len(results) - failed - skipped} rendered, {skipped} up to date, {failed} failed "
+          f"in {time.perf_counter() - start:.2f}s")
+    return 1 if failed else 0
+
+
+def _cmd_watch(args: argparse.Namespace) -> int:
+    if args.cache_dir is not None:
+        os.environ[CACHE_DIR_ENV] = str(args.cache_dir)
+    output_options = {k: v for k, v in (("format", args.format), ("preset", args.preset)) if v is not None}
+    try:
+        watcher = Watcher(args.configs, interval=args.interval, debounce=args.debounce,
+                          on_result=lambda r: _report(args, r), prefetch_workers=args.prefetch,
+                          profile=args.profile or args.trace is not None, output_options=output_options or None)
+    except ValueError as e:
+        print(f"drawtool watch: {e}", file=sys.stderr)
+        return 2
+    if not watcher.paths:
+        print("no configs matched", file=sys.stderr)
+        return 2
+    print(f"watching {len(watcher.paths)} config(s), Ctrl-C to stop")
+    try:
+        watcher.run(force=args.force)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def _report(args: argparse.Namespace, r: RenderResult) -> None:
+    """Print one render result (and its profile, if requested) for render and watch."""
+    if r.ok:
+        if args.quiet:
+            return
+        if r.skipped:
+            print(f"skip  {r.seconds:7.2f}s  {r.config_path} (up to date)")
+        else:
+            print(f"ok    {r.seconds:7.2f}s  {r.config_path} -> {r.output_path} ({'; '.join(r.reasons)})")
+    else:
+        print(f"FAIL  {r.seconds:7.2f}s  {r.config_path}: {r.error}", file=sys.stderr)
+    if r.profile is not None:
+        if args.profile:
+            print(r.profile.summary())
+        if args.trace is not None:
+            r.profile.write_chrome_trace(args.trace / f"{Path(r.config_path).stem}.trace.json")
+
+
+def _cmd_validate(args: argparse.Namespace) -> int:
+    paths = expand_config_paths(args.configs)
+    if not paths:
+        print("no configs matched", file=sys.stderr)
+        return 2
+    failed = 0
+    for path in paths:
+        try:
+            validate_config(load_config(path))
+        except Exception as e:
+            failed += 1
+            print(f"FAIL  {path}: {type(e).__name__}: {e}", file=sys.stderr)
+        else:
+            if not args.quiet:
+                print(f"ok    {path}")
+    print(f"{len(paths) - failed} valid, {failed} invalid")
+    return 1 if failed else 0
+
+
+def _cmd_cache(args: argparse.Namespace) -> int:
+    directory = args.cache_dir or os.environ.get(CACHE_DIR_ENV)
+    if not directory:
+        print(f"no cache directory: pass --cache-dir or set {CACHE_DIR_ENV}", file=sys.stderr)
+        return 2
+    cache = DiskCache(directory)
+    if args.action == "clear":
+        print(f"removed {cache.clear()} entries from {cache.directory}")
+        return 0
+    st = cache.stats()
+    print(f"directory  {st['directory']}")
+    print(f"entries    {st['entries']}")
+    print(f"size       {st['bytes'] / 1e6:.1f} MB of {st['max_bytes'] / 1e6:.0f} MB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
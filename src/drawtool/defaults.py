@@ -1,4 +1,4 @@
-"""Default configuration for text rendering."""
+"""Default configuration for text, image, shape and output rendering."""
 
 from pathlib import Path
 from typing import List, Dict, Any, Literal
@@ -88,3 +88,76 @@ class ImageDefaults:
             "anchor_v": cls.ANCHOR_VERTICAL,
             "anchor_h": cls.ANCHOR_HORIZONTAL,
         }
+
+
+class ShapeDefaults:
+    """Default shape rendering settings."""
+
+    # Fill color of rect, rounded_rect and ellipse (None = not filled)
+    FILL: str | None = None
+
+    # Outline color, and the color of line, polyline and arrow
+    STROKE: str = "#000000"
+
+    # Outline / line width in pixels (0 = no outline)
+    STROKE_WIDTH: int = 1
+
+    # Corner radius of rounded_rect (pixels)
+    RADIUS: int = 8
+
+    # Length of an arrow head (pixels); its width is the same
+    HEAD_SIZE: int = 12
+
+    # Shape alpha/opacity (0-255, 255=opaque, 0=transparent)
+    ALPHA: int = 255
+
+    # Shape rotation in degrees (clockwise)
+    ROTATION: float = 0.0
+
+    # Anchor point of rect, rounded_rect and ellipse - vertical (top, middle, bottom)
+    ANCHOR_VERTICAL: Literal["top", "middle", "bottom"] = "top"
+
+    # Anchor point of rect, rounded_rect and ellipse - horizontal (left, center, right)
+    ANCHOR_HORIZONTAL: Literal["left", "center", "right"] = "left"
+
+    @classmethod
+    def get_defaults(cls) -> Dict[str, Any]:
+        """Get all shape defaults as a dictionary."""
+        return {
+            "fill": cls.FILL,
+            "stroke": cls.STROKE,
+            "stroke_width": cls.STROKE_WIDTH,
+            "radius": cls.RADIUS,
+            "head_size": cls.HEAD_SIZE,
+            "alpha": cls.ALPHA,
+            "rotation": cls.ROTATION,
+            "anchor_v": cls.ANCHOR_VERTICAL,
+            "anchor_h": cls.ANCHOR_HORIZONTAL,
+        }
+
+
+class OutputDefaults:
+    """Default output encoding settings."""
+
+    # Output file path (relative to the config file)
+    PATH: str = "build/figure.png"
+
+    # Drop the alpha channel when the output has no transparent pixels ("auto", True, False)
+    FLATTEN: bool | Literal["auto"] = "auto"
+
+    # Encoder settings filled in by output.preset (explicit output options take precedence)
+    PRESETS: Dict[str, Dict[str, Any]] = {
+        # Fastest save: light PNG compression, fast WebP method, uncompressed TIFF
+        "draft": {"compress_level": 1, "optimize": False, "quality": 80, "method": 0, "compression": "raw"},
+        # Smallest file: maximum compression and optimization
+        "final": {"compress_level": 9, "optimize": True, "quality": 95, "method": 6,
+                  "compression": "tiff_adobe_deflate"},
+    }
+
+    @classmethod
+    def get_defaults(cls) -> Dict[str, Any]:
+        """Get all output defaults as a dictionary."""
+        return {
+            "path": cls.PATH,
+            "flatten": cls.FLATTEN,
+        }
@@ -0,0 +1,216 @@
+"""On-disk cache of transformed asset rasters, shared between processes."""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import struct
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Hashable, List, Optional, Tuple
+
+from drawtool.manifest import file_sha256
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+
+# Environment variable naming the default cache directory (unset = no disk cache)
+CACHE_DIR_ENV = "DRAWTOOL_CACHE_DIR"
+
+DEFAULT_DISK_CACHE_BYTES: int = 2 * 1024 * 1024 * 1024
+
+# Bump when the entry format or the transforms change; old entries are then ignored
+DISK_CACHE_VERSION = 2
+
+# Eviction trims the cache to this fraction of max_bytes, so it does not run on every put
+EVICT_TO = 0.9
+
+_MAGIC = b"DTC1"
+# magic, mode (4 bytes, space padded), width, height
+_HEADER = struct.Struct(">4s4sII")
+_SUFFIX = ".raster"
+
+
+class DiskCache:
+    """Directory of raw image rasters keyed by source content hash and transform.
+
+    Safe for concurrent readers and writers in several processes: entries are
+    written to a temporary file and renamed into place, so a reader sees
+    either a complete entry or none. Unreadable entries count as misses.
+    Hits refresh the entry's mtime, and eviction removes the least recently
+    used entries once the directory grows past max_bytes.
+    """
+
+    def __init__(self, directory: str | Path, max_bytes: int = DEFAULT_DISK_CACHE_BYTES) -> None:
+        self.directory = Path(directory).expanduser()
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # Approximate size of the directory; None until first measured
+        self._bytes: Optional[int] = None
+        # (path, mtime_ns, size) -> sha256 of the file, so each source is hashed once per process
+        self._hashes: Dict[Tuple[str, int, int], str] = {}
+
+    @property
+    def root(self) -> Path:
+        """Directory holding the entries of the current cache version."""
+        return self.directory / f"v{DISK_CACHE_VERSION}"
+
+    def source_hash(self, file_key: Tuple[str, int, int]) -> str:
+        """Content hash of an asset file identified by asset_key()."""
+        digest = self._hashes.get(file_key)
+        if digest is None:
+            digest = file_sha256(Path(file_key[0]))
+            self._hashes[file_key] = digest
+        return digest
+
+    def get(self, key: Hashable) -> Optional[Image.Image]:
+        """Return the cached image for key, or None."""
+        path = self._entry_path(key)
+        try:
+            with path.open("rb") as f:
+                data = f.read()
+            img = _decode(data)
+        except (OSError, ValueError, KeyError, TypeError):
+            img = None
+        if img is None:
+            with self._lock:
+                self.misses += 1
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return img
+
+    def put(self, key: Hashable, img: Image.Image) -> None:
+        """Store an image; errors (disk full, permissions) are ignored."""
+        data = _encode(img)
+        if len(data) > self.max_bytes:
+            return
+        path = self._entry_path(key)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.{os.urandom(4).hex()}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with tmp.open("wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except OSError:
+            tmp.unlink(missing_ok=True)
+            return
+        with self._lock:
+            if self._bytes is None:
+                self._bytes = self._measure()
+            else:
+                self._bytes += len(data)
+            over = self._bytes > self.max_bytes
+        if over:
+            self.evict()
+
+    def evict(self, max_bytes: Optional[int] = None) -> int:
+        """Remove least recently used entries until the cache is within budget; returns bytes freed."""
+        limit = int((self.max_bytes if max_bytes is None else max_bytes) * EVICT_TO)
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        freed = 0
+        for path, size, _ in sorted(entries, key=lambda e: e[2]):
+            if total - freed <= limit:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass  # removed by another process
+            except OSError:
+                continue
+            freed += size
+        with self._lock:
+            self._bytes = total - freed
+        return freed
+
+    def clear(self) -> int:
+        """Remove every entry (all cache versions); returns the number of files removed."""
+        removed = 0
+        if self.directory.is_dir():
+            for path in self.directory.rglob(f"*{_SUFFIX}"):
+                try:
+                    path.unlink()
+                    removed += 1
+                except OSError:
+                    pass
+        with self._lock:
+            self._bytes = 0
+            self.hits = 0
+            self.misses = 0
+        return removed
+
+    def entries(self) -> List[Tuple[Path, int, int]]:
+        """(path, size, mtime_ns) of every entry of the current version."""
+        result: List[Tuple[Path, int, int]] = []
+        if not self.root.is_dir():
+            return result
+        for path in self.root.rglob(f"*{_SUFFIX}"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            result.append((path, st.st_size, st.st_mtime_ns))
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Entry count and size on disk, plus this process's hit/miss counters."""
+        entries = self.entries()
+        return {
+            "directory": str(self.directory),
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def _entry_path(self, key: Hashable) -> Path:
+        import PIL
+
+        digest = hashlib.sha256(repr((PIL.__version__, key)).encode("utf-8")).hexdigest()
+        return self.root / digest[:2] / f"{digest}{_SUFFIX}"
+
+    def _measure(self) -> int:
+        return sum(size for _, size, _ in self.entries())
+
+
+def _encode(img: Image.Image) -> bytes:
+    header = _HEADER.pack(_MAGIC, img.mode.ljust(4).encode("ascii"), img.width, img.height)
+    return header + img.tobytes()
+
+
+def _decode(data: bytes) -> Optional[Image.Image]:
+    from PIL import Image
+
+    if len(data) < _HEADER.size:
+        return None
+    magic, mode, width, height = _HEADER.unpack_from(data)
+    if magic != _MAGIC:
+        return None
+    mode_name = mode.decode("ascii").strip()
+    pixels = memoryview(data)[_HEADER.size:]
+    if len(pixels) != width * height * Image.getmodebands(mode_name):
+        return None  # truncated or foreign file
+    return Image.frombytes(mode_name, (width, height), pixels)
+
+
+_default_caches: Dict[str, DiskCache] = {}
+
+
+def default_disk_cache() -> Optional[DiskCache]:
+    """Process-wide DiskCache for $DRAWTOOL_CACHE_DIR, or None if it is not set."""
+    directory = os.environ.get(CACHE_DIR_ENV)
+    if not directory:
+        return None
+    cache = _default_caches.get(directory)
+    if cache is None:
+        cache = _default_caches[directory] = DiskCache(directory)
+    return cache
@@ -0,0 +1,160 @@
+"""Output encoding: format selection, encoder options and alpha flattening."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+
+from drawtool.defaults import OutputDefaults
+
+# Pillow is imported inside the functions that touch pixels, so that
+# output_settings() (used by config validation) works without loading it
+if TYPE_CHECKING:
+    from PIL import Image
+
+
+# Supported output formats: Pillow format name and file suffixes (first is canonical)
+OUTPUT_FORMATS: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    "png": ("PNG", (".png",)),
+    "jpeg": ("JPEG", (".jpg", ".jpeg")),
+    "webp": ("WEBP", (".webp",)),
+    "tiff": ("TIFF", (".tif", ".tiff")),
+}
+
+# Encoder options passed to Image.save() per format; other options are ignored for that format
+FORMAT_OPTIONS: Dict[str, Tuple[str, ...]] = {
+    "png": ("compress_level", "optimize", "dpi"),
+    "jpeg": ("quality", "optimize", "dpi"),
+    "webp": ("quality", "lossless", "method"),
+    "tiff": ("compression", "dpi"),
+}
+
+# Formats that cannot store an alpha channel
+OPAQUE_FORMATS = ("jpeg",)
+
+TIFF_COMPRESSIONS = ("raw", "tiff_lzw", "tiff_deflate", "tiff_adobe_deflate")
+
+
+@dataclass
+class OutputSettings:
+    """Resolved output encoding for one render."""
+
+    # Key of OUTPUT_FORMATS, or None to let Pillow pick from the file suffix
+    format: Optional[str]
+    flatten: bool | str = OutputDefaults.FLATTEN
+    # Image.save() keyword arguments for the format
+    options: Dict[str, Any] = field(default_factory=dict)
+
+    def output_path(self, path: Path) -> Path:
+        """path with its suffix replaced if it does not match the format."""
+        if self.format is None:
+            return path
+        suffixes = OUTPUT_FORMATS[self.format][1]
+        return path if path.suffix.lower() in suffixes else path.with_suffix(suffixes[0])
+
+    def should_flatten(self, background_opaque: bool) -> Optional[bool]:
+        """Whether to write RGB; None if only the rendered pixels can tell (auto, transparent background)."""
+        if self.format in OPAQUE_FORMATS or self.flatten is True:
+            return True
+        if self.flatten is False:
+            return False
+        # Compositing never lowers alpha, so an opaque background stays opaque
+        return True if background_opaque else None
+
+
+@dataclass
+class OutputTarget:
+    """One output file of a render: where to write it, how to encode it and which part at what scale."""
+
+    path: Path
+    settings: OutputSettings
+    # Output size relative to the canvas (0 < scale <= 1)
+    scale: float = 1.0
+    # Part of the canvas written, in canvas coordinates; None for the whole canvas
+    region: Optional[Tuple[int, int, int, int]] = None
+    # The target's entry in a list-form output section (hashed into its build digest)
+    spec: Optional[Dict[str, Any]] = None
+
+
+def output_settings(output_cfg: Dict[str, Any] | None, path: Path | None = None,
+                    overrides: Dict[str, Any] | None = None) -> OutputSettings:
+    """Resolve the config's output section (plus render() overrides) into OutputSettings.
+
+    The format is output.format if given, else inferred from the path suffix.
+    Preset values are used for options not set explicitly.
+    """
+    opts = {k: v for k, v in (output_cfg or {}).items() if k != "path"}
+    opts.update(overrides or {})
+
+    fmt = opts.get("format")
+    if fmt is not None:
+        fmt = str(fmt).lower()
+        fmt = "jpeg" if fmt == "jpg" else "tiff" if fmt == "tif" else fmt
+        if fmt not in OUTPUT_FORMATS:
+            raise ValueError(f"output.format must be one of {', '.join(OUTPUT_FORMATS)}: {opts['format']}")
+    elif path is not None:
+        fmt = next((k for k, (_, sfx) in OUTPUT_FORMATS.items() if path.suffix.lower() in sfx), None)
+
+    preset = opts.get("preset")
+    if preset is not None:
+        if preset not in OutputDefaults.PRESETS:
+            raise ValueError(f"output.preset must be one of {', '.join(OutputDefaults.PRESETS)}: {preset}")
+        opts = {**OutputDefaults.PRESETS[preset], **opts}
+
+    flatten = opts.get("flatten", OutputDefaults.FLATTEN)
+    if flatten not in (True, False, "auto"):
+        raise ValueError("output.flatten must be true, false or \"auto\"")
+    _check_int(opts, "compress_level", 0, 9)
+    _check_int(opts, "quality", 1, 100)
+    _check_int(opts, "method", 0, 6)
+    for key in ("optimize", "lossless"):
+        if key in opts and not isinstance(opts[key], bool):
+            raise ValueError(f"output.{key} must be true or false")
+    if "compression" in opts and opts["compression"] not in TIFF_COMPRESSIONS:
+        raise ValueError(f"output.compression must be one of {', '.join(TIFF_COMPRESSIONS)}")
+    if "dpi" in opts:
+        dpi = opts["dpi"]
+        if isinstance(dpi, bool) or not isinstance(dpi, (int, float)) or dpi <= 0:
+            raise ValueError("output.dpi must be a positive number")
+        opts["dpi"] = (dpi, dpi)
+
+    options = {k: opts[k] for k in FORMAT_OPTIONS.get(fmt, ()) if k in opts}
+    return OutputSettings(format=fmt, flatten=flatten, options=options)
+
+
+def is_opaque_color(color: str) -> bool:
+    """True if a Pillow color string has no transparency (e.g. "#FFFFFF", not "#FFFFFF80")."""
+    from PIL import ImageColor
+
+    return ImageColor.getcolor(color, "RGBA")[3] == 255
+
+
+def flatten_image(img: Image.Image, opaque: bool = False) -> Image.Image:
+    """RGB copy of an RGBA image; any transparent pixels are composited over white.
+
+    opaque=True skips checking for transparent pixels when the caller knows there are none.
+    """
+    from PIL import Image
+
+    if not opaque and img.getchannel("A").getextrema()[0] < 255:
+        img = Image.alpha_composite(Image.new("RGBA", img.size, (255, 255, 255, 255)), img)
+    return img.convert("RGB")
+
+
+def save_image(img: Image.Image, path: Path, settings: OutputSettings, background_opaque: bool = False) -> None:
+    """Save a rendered RGBA canvas with the resolved encoding."""
+    flatten = settings.should_flatten(background_opaque)
+    opaque = background_opaque
+    if flatten is None:
+        # auto: flatten only if no pixel ended up transparent
+        flatten = opaque = img.getchannel("A").getextrema()[0] == 255
+    if flatten:
+        img = flatten_image(img, opaque)
+    pil_format = OUTPUT_FORMATS[settings.format][0] if settings.format else None
+    img.save(path, format=pil_format, **settings.options)
+
+
+def _check_int(opts: Dict[str, Any], key: str, lo: int, hi: int) -> None:
+    if key in opts and not (isinstance(opts[key], int) and not isinstance(opts[key], bool) and lo <= opts[key] <= hi):
+        raise ValueError(f"output.{key} must be an integer in [{lo}, {hi}]")
@@ -0,0 +1,124 @@
+"""Font file resolution and a bounded cache of loaded fonts."""
+
+from __future__ import annotations
+
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from PIL import ImageFont
+
+from drawtool.defaults import TextDefaults
+
+
+# Directories searched when font.family is a font name rather than a file
+FONT_DIRS: List[Path] = [
+    Path("C:/Windows/Fonts"),  # Windows
+    Path("/usr/share/fonts"),  # Linux
+    Path("/usr/local/share/fonts"),
+    Path.home() / ".local/share/fonts",
+    Path.home() / ".fonts",
+    Path("/Library/Fonts"),  # macOS
+    Path("/System/Library/Fonts"),
+    Path.home() / "Library/Fonts",
+]
+
+FONT_SUFFIXES: Tuple[str, ...] = (".ttf", ".otf", ".ttc")
+
+# File name suffixes that mark the bold face of a family (e.g. DejaVuSans-Bold, timesbd)
+BOLD_SUFFIXES: Tuple[str, ...] = ("bold", "bd", "b")
+
+# Maximum number of (file, size) font objects kept alive
+FONT_CACHE_SIZE: int = 256
+
+AnyFont = ImageFont.FreeTypeFont | ImageFont.ImageFont
+
+
+def load_font(size: int, bold: bool = False, family: str | None = None) -> AnyFont:
+    """Load a font for the given family, size and weight.
+
+    family may be a font file path or a font name looked up in FONT_DIRS.
+    Unknown or default families fall back to TextDefaults.FONT_PATHS /
+    BOLD_FONT_PATHS, then to Pillow's built-in font.
+    """
+    font_path = font_file(bold, family)
+    if font_path is None:
+        return _default_font()
+    return _truetype(str(font_path), size)
+
+
+def font_file(bold: bool = False, family: str | None = None) -> Optional[Path]:
+    """Font file load_font() uses for family/bold, or None for Pillow's built-in font."""
+    return resolve_font_file(
+        family, bold, tuple(TextDefaults.FONT_PATHS), tuple(TextDefaults.BOLD_FONT_PATHS)
+    )
+
+
+@lru_cache(maxsize=None)
+def resolve_font_file(family: str | None, bold: bool,
+                      regular_chain: Tuple[Path, ...], bold_chain: Tuple[Path, ...]) -> Optional[Path]:
+    """First loadable font file for family/bold, trying the fallback chains after it."""
+    candidates: List[Path] = []
+    if family and _normalize(family) != _normalize(TextDefaults.DEFAULT_FONT_FAMILY):
+        candidates.extend(_family_candidates(family, bold))
+    if bold:
+        candidates.extend(bold_chain)
+    candidates.extend(regular_chain)
+
+    for font_path in candidates:
+        if not font_path.exists():
+            continue
+        try:
+            ImageFont.truetype(str(font_path), size=TextDefaults.FONT_SIZE)
+        except Exception:
+            continue
+        return font_path
+    return None
+
+
+def clear_font_cache() -> None:
+    """Forget resolved font files, loaded fonts and the font directory index."""
+    resolve_font_file.cache_clear()
+    _truetype.cache_clear()
+    _font_index.cache_clear()
+
+
+def _family_candidates(family: str, bold: bool) -> List[Path]:
+    """Font files that may provide family, best match first."""
+    as_path = Path(family).expanduser()
+    if as_path.suffix.lower() in FONT_SUFFIXES:
+        return [as_path]
+
+    index = _font_index()
+    name = _normalize(family)
+    stems = [name + suffix for suffix in BOLD_SUFFIXES] if bold else []
+    stems += [name, name + "regular"]
+    return [index[stem] for stem in stems if stem in index]
+
+
+@lru_cache(maxsize=1)
+def _font_index() -> Dict[str, Path]:
+    """Map normalized font file names found under FONT_DIRS to their paths."""
+    index: Dict[str, Path] = {}
+    for font_dir in FONT_DIRS:
+        if not font_dir.is_dir():
+            continue
+        for font_path in sorted(font_dir.rglob("*")):
+            if font_path.suffix.lower() in FONT_SUFFIXES:
+                index.setdefault(_normalize(font_path.stem), font_path)
+    return index
+
+
+def _normalize(name: str) -> str:
+    """Lowercase a font name and drop spaces, dashes and other separators."""
+    return "".join(ch for ch in name.lower() if ch.isalnum())
+
+
+@lru_cache(maxsize=FONT_CACHE_SIZE)
+def _truetype(font_file: str, size: int) -> ImageFont.FreeTypeFont:
+    return ImageFont.truetype(font_file, size=size)
+
+
+@lru_cache(maxsize=1)
+def _default_font() -> ImageFont.ImageFont:
+    return ImageFont.load_default()
@@ -0,0 +1,107 @@
+"""Build manifests used to skip re-rendering figures whose inputs are unchanged."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+
+# Bump when rendering changes in a way that should invalidate existing outputs
+MANIFEST_VERSION: int = 3
+
+
+@dataclass
+class BuildDecision:
+    """Whether an output must be rebuilt, and why."""
+
+    rebuild: bool
+    reasons: List[str] = field(default_factory=list)
+    # Current state of every input file, reused when writing the new manifest
+    files: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
+
+def manifest_path(output: Path) -> Path:
+    """Sidecar manifest file stored next to an output image."""
+    return output.with_name(f".{output.name}.drawtool.json")
+
+
+def config_digest(cfg: Dict[str, Any], params: Dict[str, Any] | None = None) -> str:
+    """Hash of the normalized config plus any render() parameters that affect the output."""
+    payload = {"config": cfg, "params": params or {}}
+    data = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def check_build(output: Path, digest: str, inputs: Iterable[Path], force: bool = False) -> BuildDecision:
+    """Compare an output's manifest with the current config digest and input files."""
+    previous = _read_manifest(output)
+    prev_files: Dict[str, Dict[str, Any]] = previous.get("files", {}) if previous else {}
+
+    # Missing inputs are left out; rendering reports them
+    files: Dict[str, Dict[str, Any]] = {}
+    for p in inputs:
+        key = str(p)
+        if key not in files and p.is_file():
+            files[key] = _file_record(p, prev_files.get(key))
+
+    reasons: List[str] = []
+    if force:
+        reasons.append("forced")
+    if not output.exists():
+        reasons.append("output missing")
+    if previous is None:
+        reasons.append("no build manifest")
+    else:
+        if previous.get("version") != MANIFEST_VERSION:
+            reasons.append("manifest version changed")
+        if previous.get("config") != digest:
+            reasons.append("config changed")
+        for key in sorted(set(files) | set(prev_files)):
+            if key not in prev_files:
+                reasons.append(f"input added: {key}")
+            elif key not in files:
+                reasons.append(f"input removed: {key}")
+            elif files[key]["sha256"] != prev_files[key].get("sha256"):
+                reasons.append(f"input changed: {key}")
+
+    return BuildDecision(rebuild=bool(reasons), reasons=reasons, files=files)
+
+
+def write_manifest(output: Path, digest: str, decision: BuildDecision) -> None:
+    """Record the inputs an output was built from (atomic replace)."""
+    data = {"version": MANIFEST_VERSION, "config": digest, "files": decision.files}
+    path = manifest_path(output)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def _read_manifest(output: Path) -> Optional[Dict[str, Any]]:
+    path = manifest_path(output)
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _file_record(path: Path, previous: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """mtime/size/sha256 of a file; the hash is reused while mtime and size are unchanged."""
+    st = path.stat()
+    if previous and previous.get("mtime_ns") == st.st_mtime_ns and previous.get("size") == st.st_size:
+        return previous
+    return {"mtime_ns": st.st_mtime_ns, "size": st.st_size, "sha256": file_sha256(path)}
+
+
+def file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
@@ -0,0 +1,80 @@
+"""Load assets on worker threads ahead of the order they are composited in."""
+
+from __future__ import annotations
+
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from types import TracebackType
+from typing import Any, Callable, Dict, Generic, Hashable, List, Optional, Tuple, Type, TypeVar
+
+T = TypeVar("T")
+
+# Threads decoding and transforming image assets ahead of compositing (0 = load each image when drawn)
+PREFETCH_WORKERS = 4
+
+# Images loaded ahead of the one being composited, per prefetch thread (bounds the memory held in flight)
+PREFETCH_DEPTH = 2
+
+
+class Prefetcher(Generic[T]):
+    """Run load tasks on a thread pool, in consumption order and at most depth ahead.
+
+    tasks is a list of (key, group, load) in the order their results will be
+    requested with result(key). Tasks sharing a group (e.g. the same source
+    file) run one after another, so later ones can reuse what earlier ones
+    cached instead of decoding the same file concurrently. Exceptions are
+    raised from result() for the task that failed.
+
+    Usage::
+
+        with Prefetcher(tasks, workers=4, depth=8) as pf:
+            for key in keys:
+                img = pf.result(key)
+    """
+
+    def __init__(self, tasks: List[Tuple[Hashable, Hashable, Callable[[], T]]], workers: int,
+                 depth: int) -> None:
+        if workers < 1:
+            raise ValueError("workers must be >= 1")
+        self._tasks = tasks
+        self._depth = max(1, depth)
+        self._submitted = 0
+        self._consumed = 0
+        self._futures: Dict[Hashable, Future[T]] = {}
+        self._group_tail: Dict[Hashable, Future[T]] = {}
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="drawtool-prefetch")
+        self._fill()
+
+    def result(self, key: Hashable) -> T:
+        """Wait for the task of key and return its result (each key is consumed once)."""
+        self._consumed += 1
+        self._fill()
+        return self._futures.pop(key).result()
+
+    def close(self) -> None:
+        """Cancel tasks not started yet and wait for running ones."""
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        self._futures.clear()
+        self._group_tail.clear()
+
+    def __enter__(self) -> Prefetcher[T]:
+        return self
+
+    def __exit__(self, exc_type: Optional[Type[BaseException]], exc: Optional[BaseException],
+                 tb: Optional[TracebackType]) -> None:
+        self.close()
+
+    def _fill(self) -> None:
+        limit = min(len(self._tasks), self._consumed + self._depth)
+        while self._submitted < limit:
+            key, group, load = self._tasks[self._submitted]
+            self._submitted += 1
+            fut = self._pool.submit(_after, self._group_tail.get(group), load)
+            self._futures[key] = fut
+            self._group_tail[group] = fut
+
+
+def _after(previous: Optional[Future[Any]], load: Callable[[], T]) -> T:
+    # The pool starts tasks in submission order, so previous is already running or done
+    if previous is not None:
+        wait([previous])
+    return load()
@@ -0,0 +1,261 @@
+"""Opt-in timing of render stages, with per-element reports and Chrome trace output."""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import TracebackType
+from typing import Any, Dict, List, Optional, Type
+
+
+@dataclass
+class Span:
+    """One timed stage. start is seconds since the profile started."""
+
+    name: str
+    category: str
+    start: float = 0.0
+    duration: float = 0.0
+    element: Optional[str] = None
+    # Pixels allocated by the stage (width x height of the images it produced)
+    pixels: int = 0
+    # Bytes of those pixels (one per band: 3 for RGB, 4 for RGBA, 1 for masks)
+    bytes: int = 0
+    # 0 for the thread that called render(), 1, 2, ... for prefetch threads
+    thread: int = 0
+
+    def add_pixels(self, img: Any) -> None:
+        n = img.width * img.height
+        self.pixels += n
+        self.bytes += n * len(img.getbands())
+
+
+@dataclass
+class RenderProfile:
+    """Spans recorded during one render() call."""
+
+    config_path: str
+    seconds: float = 0.0
+    spans: List[Span] = field(default_factory=list)
+
+    def stages(self) -> Dict[str, Dict[str, float]]:
+        """Total seconds, pixels, bytes and call count per stage name (element spans excluded).
+
+        Stages run on prefetch threads overlap the render thread, so the totals
+        can add up to more than the wall time.
+        """
+        totals: Dict[str, Dict[str, float]] = {}
+        for s in self.spans:
+            if s.category == "element":
+                continue
+            t = totals.setdefault(s.name, {"seconds": 0.0, "pixels": 0, "bytes": 0, "count": 0})
+            t["seconds"] += s.duration
+            t["pixels"] += s.pixels
+            t["bytes"] += s.bytes
+            t["count"] += 1
+        return totals
+
+    def elements(self) -> List[Dict[str, Any]]:
+        """Per-element totals, slowest first.
+
+        An element drawn in several bands is reported once with its times summed.
+        """
+        by_element: Dict[str, Dict[str, Any]] = {}
+        for s in self.spans:
+            if s.element is None:
+                continue
+            e = by_element.setdefault(s.element, {"element": s.element, "seconds": 0.0, "pixels": 0, "bytes": 0,
+                                                  "stages": {}})
+            if s.category == "element":
+                e["seconds"] += s.duration
+            else:
+                e["pixels"] += s.pixels
+                e["bytes"] += s.bytes
+                e["stages"][s.name] = e["stages"].get(s.name, 0.0) + s.duration
+        return sorted(by_element.values(), key=lambda e: e["seconds"], reverse=True)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serializable report."""
+        return {
+            "config": self.config_path,
+            "seconds": self.seconds,
+            "stages": self.stages(),
+            "elements": self.elements(),
+        }
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """The spans in Chrome trace event format (chrome://tracing, Perfetto)."""
+        pid = os.getpid()
+        events: List[Dict[str, Any]] = [
+            {"name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": self.config_path}},
+        ]
+        for tid in sorted({s.thread for s in self.spans}):
+            events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid,
+                           "args": {"name": f"prefetch-{tid}" if tid else "render"}})
+        for s in self.spans:
+            args: Dict[str, Any] = {"pixels": s.pixels, "bytes": s.bytes}
+            if s.element is not None:
+                args["element"] = s.element
+            events.append({
+                "name": s.element if s.category == "element" else s.name,
+                "cat": s.category,
+                "ph": "X",
+                "ts": s.start * 1e6,
+                "dur": s.duration * 1e6,
+                "pid": pid,
+                "tid": s.thread,
+                "args": args,
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_chrome_trace(self, path: str | Path) -> Path:
+        """Write the Chrome trace JSON to path."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("w", encoding="utf-8") as f:
+            json.dump(self.chrome_trace(), f)
+        return path
+
+    def summary(self, top: int = 10) -> str:
+        """Human-readable stage totals and the slowest elements."""
+        lines = [f"{self.config_path}: {self.seconds * 1000:.1f} ms"]
+        for name, t in sorted(self.stages().items(), key=lambda kv: kv[1]["seconds"], reverse=True):
+            lines.append(f"  {name:<10} {t['seconds'] * 1000:9.1f} ms  {int(t['count']):6d}x  "
+                         f"{int(t['pixels']) / 1e6:8.2f} MPx  {int(t['bytes']) / 1e6:8.1f} MB")
+        for e in self.elements()[:top]:
+            stages = ", ".join(f"{k} {v * 1000:.1f}" for k, v in e["stages"].items())
+            lines.append(f"  [{e['element']}] {e['seconds'] * 1000:.1f} ms, {e['bytes'] / 1e6:.1f} MB ({stages})")
+        return "\n".join(lines)
+
+
+class _SpanTimer:
+    __slots__ = ("profiler", "span", "_start")
+
+    def __init__(self, profiler: Profiler, span: Span) -> None:
+        self.profiler = profiler
+        self.span = span
+
+    def __enter__(self) -> Span:
+        self._start = time.perf_counter()
+        return self.span
+
+    def __exit__(self, exc_type: Optional[Type[BaseException]], exc: Optional[BaseException],
+                 tb: Optional[TracebackType]) -> None:
+        end = time.perf_counter()
+        self.span.start = self._start - self.profiler.started
+        self.span.duration = end - self._start
+        self.profiler._record(self.span)
+
+
+class _ElementTimer(_SpanTimer):
+    __slots__ = ("_outer",)
+
+    def __enter__(self) -> Span:
+        self._outer = self.profiler._current_element()
+        self.profiler._local.element = self.span.element
+        return super().__enter__()
+
+    def __exit__(self, exc_type: Optional[Type[BaseException]], exc: Optional[BaseException],
+                 tb: Optional[TracebackType]) -> None:
+        super().__exit__(exc_type, exc, tb)
+        self.profiler._local.element = self._outer
+
+
+class _Attribution:
+    __slots__ = ("profiler", "element", "_outer")
+
+    def __init__(self, profiler: Profiler, element: str) -> None:
+        self.profiler = profiler
+        self.element = element
+
+    def __enter__(self) -> None:
+        self._outer = self.profiler._current_element()
+        self.profiler._local.element = self.element
+
+    def __exit__(self, exc_type: Optional[Type[BaseException]], exc: Optional[BaseException],
+                 tb: Optional[TracebackType]) -> None:
+        self.profiler._local.element = self._outer
+
+
+class Profiler:
+    """Collects spans for one render.
+
+    Usage::
+
+        with profiler.span("resize") as s:
+            img = img.resize(...)
+            s.add_pixels(img)
+    """
+
+    enabled = True
+
+    def __init__(self, config_path: str | Path = "") -> None:
+        self.config_path = str(config_path)
+        self.started = time.perf_counter()
+        self._spans: List[Span] = []
+        # Element being drawn, per thread
+        self._local = threading.local()
+        self._threads: Dict[int, int] = {threading.get_ident(): 0}
+        self._lock = threading.Lock()
+
+    def span(self, name: str, category: str = "stage") -> _SpanTimer:
+        """Time a stage; it is attributed to the element being drawn, if any."""
+        return _SpanTimer(self, Span(name, category, element=self._current_element()))
+
+    def element(self, label: str) -> _ElementTimer:
+        """Time drawing one element; spans opened inside are attributed to it."""
+        return _ElementTimer(self, Span("element", "element", element=label))
+
+    def attribute(self, label: str) -> _Attribution:
+        """Attribute spans opened inside to an element without timing it (work done on its behalf elsewhere)."""
+        return _Attribution(self, label)
+
+    def report(self) -> RenderProfile:
+        with self._lock:
+            spans = sorted(self._spans, key=lambda s: s.start)
+        return RenderProfile(self.config_path, time.perf_counter() - self.started, spans)
+
+    def _current_element(self) -> Optional[str]:
+        return getattr(self._local, "element", None)
+
+    def _record(self, span: Span) -> None:
+        ident = threading.get_ident()
+        with self._lock:
+            span.thread = self._threads.setdefault(ident, len(self._threads))
+            self._spans.append(span)
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self) -> Span:
+        return _NULL_SPAN
+
+    def __exit__(self, exc_type: Optional[Type[BaseException]], exc: Optional[BaseException],
+                 tb: Optional[TracebackType]) -> None:
+        return None
+
+
+class NullProfiler:
+    """Profiler stand-in used when profiling is off; records nothing."""
+
+    enabled = False
+
+    def span(self, name: str, category: str = "stage") -> _NullTimer:
+        return _NULL_TIMER
+
+    def element(self, label: str) -> _NullTimer:
+        return _NULL_TIMER
+
+    def attribute(self, label: str) -> _NullTimer:
+        return _NULL_TIMER
+
+
+# Shared scratch span handed out by the null profiler; whatever is written to it is ignored
+_NULL_SPAN = Span("", "")
+_NULL_TIMER = _NullTimer()
+NULL_PROFILER = NullProfiler()
@@ -1,100 +1,438 @@
 from __future__ import annotations
 
-import json
-from dataclasses import dataclass
+import copy
+import math
+import threading
+import time
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from functools import lru_cache, partial
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
 from PIL import Image, ImageDraw, ImageFilter, ImageFont
 
-from drawtool.defaults import TextDefaults, ImageDefaults
+from drawtool.cache import AssetCache, asset_key, shared_asset_cache, shared_layer_cache
+from drawtool.defaults import TextDefaults, ImageDefaults, OutputDefaults, ShapeDefaults
+from drawtool.diskcache import DiskCache, default_disk_cache
+from drawtool.encoding import OutputTarget, flatten_image, is_opaque_color, output_settings, save_image
+from drawtool.fonts import FONT_SUFFIXES, font_file, load_font
+from drawtool.manifest import BuildDecision, check_build, config_digest, write_manifest
+from drawtool.prefetch import PREFETCH_DEPTH, PREFETCH_WORKERS, Prefetcher
+from drawtool.profiling import NULL_PROFILER, NullProfiler, Profiler, RenderProfile
+from drawtool.spatial import GridIndex
+from drawtool.streaming import PngStreamWriter
+from drawtool.validation import BOX_SHAPES, CROP_SIDES, GLOW_MODES, load_config, validate_config, validate_region
+
+
+# Glowing text is anchored as if padded by radius * GLOW_LAYOUT_MARGIN per side
+GLOW_LAYOUT_MARGIN = 3
+
+# Opaque line shapes larger than one tile or crossing a view edge are drawn tile
+# by tile on a grid of this size fixed to the canvas origin, since Pillow clips
+# wide lines and polygons differently depending on where the edge falls
+SHAPE_TILE = 256
+
+
+# A canvas snapshot is kept after a layer once drawing since the previous
+# snapshot took at least this long (cheaper layers are just redrawn)
+LAYER_SNAPSHOT_MIN_SECONDS = 0.05
+
+# Memory budget for cached text masks (bytes of pixel data)
+TEXT_MASK_CACHE_BYTES = 64 * 1024 * 1024
+
+# Pillow decoders that fill rows top to bottom, so decoding a crop can stop after its last row
+ROW_DECODERS = ("zip", "raw")
+
+
+# Pillow text anchor characters for anchor_h / anchor_v
+TEXT_ANCHOR_H = {"left": "l", "center": "m", "right": "r"}
+TEXT_ANCHOR_V = {"top": "a", "middle": "m", "bottom": "s"}
+
+
+@lru_cache(maxsize=1)
+def _measure_draw() -> ImageDraw.ImageDraw:
+    """Scratch ImageDraw used only for measuring text."""
+    return ImageDraw.Draw(Image.new("RGBA", (1, 1)))
+
+
+def _segment_distance(p: Tuple[float, float], a: Tuple[float, float], b: Tuple[float, float]) -> float:
+    """Distance from point p to the line segment a-b."""
+    dx, dy = b[0] - a[0], b[1] - a[1]
+    length2 = dx * dx + dy * dy
+    t = 0.0 if length2 == 0 else max(0.0, min(1.0, ((p[0] - a[0]) * dx + (p[1] - a[1]) * dy) / length2))
+    return math.hypot(p[0] - a[0] - t * dx, p[1] - a[1] - t * dy)
+
+
+def _round_point(p: Tuple[float, float]) -> Tuple[int, int]:
+    """Point rounded half up to whole pixels, so the result does not depend on an integer offset."""
+    return (math.floor(p[0] + 0.5), math.floor(p[1] + 0.5))
+
+
+@lru_cache(maxsize=4096)
+def _text_box(text: str, font: ImageFont.FreeTypeFont | ImageFont.ImageFont, align: str,
+              anchor: str) -> Tuple[int, int, int, int]:
+    """Ink box of text relative to its anchor, rounded outwards to whole pixels (measured, not drawn)."""
+    measure = _measure_draw()
+    if "\n" in text:
+        bbox = measure.multiline_textbbox((0, 0), text, font=font, align=align, anchor=anchor)
+    else:
+        bbox = measure.textbbox((0, 0), text, font=font, anchor=anchor)
+    left, top = math.floor(bbox[0]), math.floor(bbox[1])
+    return (left, top, max(math.ceil(bbox[2]), left), max(math.ceil(bbox[3]), top))
+
+
+# Laid-out text masks shared by all renderers, see FigureRenderer._text_mask
+_text_mask_cache = AssetCache(TEXT_MASK_CACHE_BYTES)
+
+
+@lru_cache(maxsize=64)
+def _glow_kernel(radius: int, mode: str) -> Tuple[Optional[ImageFilter.Filter], int]:
+    """Blur filter for a glow radius and the distance (px) its output can reach."""
+    if radius <= 0:
+        return None, 0
+    if mode == "box":
+        blur_filter: ImageFilter.Filter = ImageFilter.BoxBlur(radius * math.sqrt(3))
+    else:
+        blur_filter = ImageFilter.GaussianBlur(radius=radius)
+
+    # Measure the reach on a fully opaque half-plane, which bounds any text mask
+    span = radius * GLOW_LAYOUT_MARGIN * 2 + 2
+    edge = Image.new("L", (span * 2, 1), 0)
+    edge.paste(255, (0, 0, span, 1))
+    row = edge.filter(blur_filter).getchannel(0)
+    reach = 0
+    while reach < span and row.getpixel((span + reach, 0)) > 0:
+        reach += 1
+    return blur_filter, reach
 
 
 @dataclass
 class FigureRenderer:
     config_path: Path
+    # Decoded/transformed asset cache; defaults to the process-wide one
+    asset_cache: AssetCache | None = None
+    asset_cache_hits: int = field(default=0, init=False)
+    asset_cache_misses: int = field(default=0, init=False)
+    # Canvas snapshots between layers, reused while lower layers are unchanged; defaults to the process-wide one
+    layer_cache: AssetCache | None = None
+    # On-disk cache of transformed assets shared between processes; defaults to $DRAWTOOL_CACHE_DIR if set
+    disk_cache: DiskCache | None = None
+    # Threads loading images ahead of the one being composited; 0 loads each image when it is drawn
+    prefetch_workers: int = PREFETCH_WORKERS
+    # Number of layers restored from snapshots instead of being redrawn
+    layers_reused: int = field(default=0, init=False)
+    # Result of the last up-to-date check done by render()
+    last_build: BuildDecision | None = field(default=None, init=False)
+    # Output files of the last render(), one per output target
+    last_outputs: List[Path] = field(default_factory=list, init=False)
+    # Asset and font files the last render() depended on (what `drawtool watch` monitors)
+    last_inputs: List[Path] = field(default_factory=list, init=False)
+    # Stage timings of the last render(profile=True)
+    last_profile: RenderProfile | None = field(default=None, init=False)
+    _profiler: Profiler | NullProfiler = field(default=NULL_PROFILER, init=False, repr=False)
+    _index_cache: Tuple[List[Tuple[str, int, int]], List[Dict[str, Any]], GridIndex] | None = field(
+        default=None, init=False, repr=False)
+    # Guards the hit/miss counters, which prefetch threads update too
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
 
     def __post_init__(self) -> None:
         self.config_path = Path(self.config_path)
+        if self.asset_cache is None:
+            self.asset_cache = shared_asset_cache()
+        if self.layer_cache is None:
+            self.layer_cache = shared_layer_cache()
+        if self.disk_cache is None:
+            self.disk_cache = default_disk_cache()
+        if isinstance(self.prefetch_workers, bool) or not isinstance(self.prefetch_workers, int) \
+                or self.prefetch_workers < 0:
+            raise ValueError("prefetch_workers must be a non-negative integer")
 
-    def render(self, output_path: str | Path | None = None) -> Path:
-        cfg = self._load_config()
-        self._validate_config(cfg)
+    def render(self, output_path: str | Path | None = None, force: bool = False,
+               region: Tuple[int, int, int, int] | None = None,
+               preview_scale: float | None = None, band_height: int | None = None,
+               profile: bool = False, output_options: Dict[str, Any] | None = None) -> Path:
+        """Render the figure and save it.
+
+        If the output was already built from the same config, assets and fonts
+        (per its build manifest), it is returned without re-rendering unless
+        force is true. self.last_build records the decision and its reasons.
+
+        region=(x0, y0, x1, y1) renders only that part of the canvas: the output
+        is (x1 - x0) x (y1 - y0) pixels and elements outside it are skipped.
+
+        preview_scale (0 < s <= 1) renders a reduced-size preview: canvas,
+        positions, image scales, font sizes and glow radii are multiplied by s
+        and assets are decoded at reduced resolution. region stays in
+        full-size canvas coordinates.
+
+        band_height renders and writes the output in horizontal bands of that
+        many rows, so peak memory follows the band size rather than the
+        canvas size. The output is streamed as PNG.
+
+        output_options overrides keys of the config's output section (format,
+        preset, flatten, compress_level, optimize, quality, lossless, method,
+        compression). If the format does not match the output suffix, the
+        suffix is replaced.
+
+        profile records wall time and allocated pixels per stage (config,
+        decode, resize, rotate, glow, composite, save, ...) and per element
+        into self.last_profile (see RenderProfile).
+        """
+        self.last_profile = None
+        self._profiler = Profiler(self.config_path) if profile else NULL_PROFILER
+        try:
+            return self._render(output_path, force, region, preview_scale, band_height, output_options)
+        finally:
+            if profile:
+                self.last_profile = self._profiler.report()
+            self._profiler = NULL_PROFILER
+
+    def _render(self, output_path: str | Path | None, force: bool, region: Tuple[int, int, int, int] | None,
+                preview_scale: float | None, band_height: int | None,
+                output_options: Dict[str, Any] | None = None) -> Path:
+        prof = self._profiler
+        with prof.span("config"):
+            cfg = self._load_config()
+            self._validate_config(cfg)
+        if region is not None:
+            region = validate_region(region)
+        if preview_scale is not None and not (isinstance(preview_scale, (int, float)) and 0 < preview_scale <= 1):
+            raise ValueError("preview_scale must be in (0, 1]")
+        if band_height is not None and not (isinstance(band_height, int) and band_height > 0):
+            raise ValueError("band_height must be a positive integer")
 
         base_dir = self._assets_base_dir(cfg)
-        canvas = self._create_canvas(cfg)
-        draw = ImageDraw.Draw(canvas)
+        targets = self._output_targets(cfg, output_path, output_options)
+        if len(targets) > 1 and (region is not None or band_height is not None):
+            raise ValueError("region and band_height require a single output target")
+        if region is not None:
+            targets[0].region = region
+        if band_height is not None and targets[0].settings.format != "png":
+            raise ValueError("band_height requires PNG output")
+        self.last_outputs = [t.path for t in targets]
 
-        # Get elements: use layers if available, otherwise fall back to elements
-        all_elements = self._get_all_elements(cfg)
+        params = {"region": region, "preview_scale": preview_scale, "output_options": output_options}
+        digests = [config_digest(cfg if t.spec is None else {**cfg, "output": t.spec}, params) for t in targets]
+        with prof.span("check"):
+            inputs = self._input_files(cfg, base_dir)
+            self.last_inputs = inputs
+            builds = [check_build(t.path, d, inputs, force) for t, d in zip(targets, digests)]
+        self.last_build = self._merge_builds(targets, builds)
+        pending = [(t, d, b) for t, d, b in zip(targets, digests, builds) if b.rebuild]
+        if not pending:
+            return targets[0].path
 
-        # Draw elements (already sorted by layer order and element order)
-        for el in all_elements:
-            el_type = el["type"]
-            if el_type == "image":
-                self._draw_image(canvas, el, base_dir)
-            elif el_type == "text":
-                self._draw_text(draw, el)
-            else:
-                raise ValueError(f"Unknown element type: {el_type}")
+        # Composite once at the largest scale any pending target needs; the rest are derived
+        draft = preview_scale is not None
+        scales = [t.scale * (preview_scale or 1.0) for t, _, _ in pending]
+        base_scale = max(scales)
+        # Output sizes depend only on each target's region and scale, not on which targets are pending
+        canvas_box = (0, 0, cfg["canvas"]["width"], cfg["canvas"]["height"])
+        sizes = [self._output_size(t.region or canvas_box, s) for (t, _, _), s in zip(pending, scales)]
+        if draft or base_scale != 1.0:
+            cfg = self._scale_config(cfg, base_scale)
+        # Canvas pixels each target is cropped from: exactly its size at the base scale, else
+        # the region rounded outwards (then resampled to size)
+        boxes = [self._base_box(t.region or canvas_box, size, base_scale, s == base_scale)
+                 for (t, _, _), size, s in zip(pending, sizes, scales)]
 
-        out = self._resolve_output_path(cfg, output_path)
-        out.parent.mkdir(parents=True, exist_ok=True)
-        canvas.save(out)
-        return out
+        with prof.span("layout"):
+            # Get elements: use layers if available, otherwise fall back to elements
+            all_elements = self._get_all_elements(cfg)
+
+            # Skip elements outside every target (the canvas, or the union of the target regions)
+            view = (min(b[0] for b in boxes), min(b[1] for b in boxes),
+                    max(b[2] for b in boxes), max(b[3] for b in boxes))
+            index = GridIndex([self._element_bounds(el, base_dir) for el in all_elements])
+            stack = self._layer_stack(cfg, all_elements, base_dir)
+
+        background_opaque = is_opaque_color(cfg["canvas"]["background"])
+        if band_height is not None:
+            target = targets[0]
+            target.path.parent.mkdir(parents=True, exist_ok=True)
+            # Render and encode one horizontal band at a time; "auto" flattening
+            # can only be decided up front, from the background
+            encoding = target.settings
+            flatten = bool(encoding.should_flatten(background_opaque))
+            with PngStreamWriter(target.path, view[2] - view[0], view[3] - view[1],
+                                 mode="RGB" if flatten else "RGBA",
+                                 compress_level=encoding.options.get("compress_level", 6),
+                                 dpi=encoding.options.get("dpi")) as writer:
+                for top in range(view[1], view[3], band_height):
+                    band = (view[0], top, view[2], min(top + band_height, view[3]))
+                    band_img = self._render_view(cfg, all_elements, index, band, base_dir, draft, stack)
+                    with prof.span("encode") as sp:
+                        writer.write(flatten_image(band_img, background_opaque) if flatten else band_img)
+                        sp.add_pixels(band_img)
+            write_manifest(target.path, digests[0], builds[0])
+            return target.path
+
+        canvas = self._render_view(cfg, all_elements, index, view, base_dir, draft, stack)
+        for (target, digest, build), box, size in zip(pending, boxes, sizes):
+            exact = None if target.region is None else tuple(v * base_scale for v in target.region)
+            img = self._derive_output(canvas, view, box, size, exact)
+            target.path.parent.mkdir(parents=True, exist_ok=True)
+            with prof.span("save") as sp:
+                save_image(img, target.path, target.settings, background_opaque)
+                sp.add_pixels(img)
+            write_manifest(target.path, digest, build)
+        return targets[0].path
+
+    def _output_targets(self, cfg: Dict[str, Any], override: str | Path | None,
+                        output_options: Dict[str, Any] | None) -> List[OutputTarget]:
+        """Output targets of the config (one for a dict-form output section)."""
+        specs = cfg.get("output", {})
+        single = not isinstance(specs, list)
+        if single:
+            specs = [specs]
+        elif override is not None and len(specs) > 1:
+            raise ValueError("output_path cannot override multiple output targets")
+
+        targets: List[OutputTarget] = []
+        for spec in specs:
+            out = self._resolve_output_path({"output": spec}, override)
+            settings = output_settings(spec, out, output_options)
+            region = spec.get("region")
+            targets.append(OutputTarget(
+                path=settings.output_path(out),
+                settings=settings,
+                scale=float(spec.get("scale", 1.0)),
+                region=validate_region(tuple(region)) if region is not None else None,
+                spec=None if single else spec,
+            ))
+        if len({t.path for t in targets}) < len(targets):
+            raise ValueError("output targets must have distinct paths")
+        return targets
+
+    @staticmethod
+    def _merge_builds(targets: List[OutputTarget], builds: List[BuildDecision]) -> BuildDecision:
+        """One decision for all targets; reasons are prefixed with the output name when there are several."""
+        if len(builds) == 1:
+            return builds[0]
+        reasons = [f"{t.path.name}: {r}" for t, b in zip(targets, builds) for r in b.reasons]
+        return BuildDecision(rebuild=any(b.rebuild for b in builds), reasons=reasons, files=builds[0].files)
+
+    @staticmethod
+    def _output_size(region: Tuple[int, int, int, int], scale: float) -> Tuple[int, int]:
+        """Pixel size of an output showing a canvas region at scale (same rounding as _scale_config)."""
+        return (max(1, round((region[2] - region[0]) * scale)), max(1, round((region[3] - region[1]) * scale)))
+
+    @staticmethod
+    def _base_box(region: Tuple[int, int, int, int], size: Tuple[int, int], scale: float,
+                  exact_size: bool) -> Tuple[int, int, int, int]:
+        """Pixel box of a canvas scaled by scale that an output of region is taken from.
+
+        With exact_size the box is size pixels from the region's scaled origin
+        (the output is a plain crop); otherwise it is the scaled region rounded
+        outwards, to be resampled down to size.
+        """
+        x0, y0 = math.floor(region[0] * scale), math.floor(region[1] * scale)
+        if exact_size:
+            return (x0, y0, x0 + size[0], y0 + size[1])
+        return (x0, y0, math.ceil(region[2] * scale), math.ceil(region[3] * scale))
+
+    def _derive_output(self, canvas: Image.Image, view: Tuple[int, int, int, int],
+                       box: Tuple[int, int, int, int], size: Tuple[int, int],
+                       exact: Tuple[float, float, float, float] | None = None) -> Image.Image:
+        """The part of a rendered view covering box, resized to size.
+
+        exact is the (fractional) part of the canvas the output shows, if
+        narrower than box; it is resampled instead of the whole box.
+        """
+        img = canvas
+        if box != view:
+            with self._profiler.span("crop") as sp:
+                img = canvas.crop((box[0] - view[0], box[1] - view[1], box[2] - view[0], box[3] - view[1]))
+                sp.add_pixels(img)
+        if img.size != size:
+            inner = None if exact is None else (exact[0] - box[0], exact[1] - box[1],
+                                                exact[2] - box[0], exact[3] - box[1])
+            with self._profiler.span("resize") as sp:
+                img = img.resize(size, resample=Image.Resampling.LANCZOS, box=inner)
+                sp.add_pixels(img)
+        return img
+
+    # ---------- hit-testing ----------
+    def elements_at(self, x: int, y: int) -> List[Dict[str, Any]]:
+        """Elements whose box contains canvas point (x, y), in draw order (last is topmost)."""
+        elements, index = self._element_index()
+        return [elements[i] for i in index.query_point(x, y)]
+
+    def elements_in(self, rect: Tuple[int, int, int, int]) -> List[Dict[str, Any]]:
+        """Elements whose box intersects rect=(x0, y0, x1, y1), in draw order."""
+        elements, index = self._element_index()
+        return [elements[i] for i in index.query_rect(tuple(rect))]
+
+    def _element_index(self) -> Tuple[List[Dict[str, Any]], GridIndex]:
+        """Spatial index of the config's elements, rebuilt only when the config or its inputs change."""
+        if self._index_cache is not None:
+            files, elements, index = self._index_cache
+            if self._files_unchanged(files):
+                return elements, index
 
-    # ---------- config ----------
-    def _load_config(self) -> Dict[str, Any]:
         if not self.config_path.exists():
             raise FileNotFoundError(f"Config not found: {self.config_path}")
-        with self.config_path.open("r", encoding="utf-8") as f:
-            return json.load(f)
+        config_key = asset_key(self.config_path)
+        cfg = self._load_config()
+        self._validate_config(cfg)
+        base_dir = self._assets_base_dir(cfg)
+        elements = self._get_all_elements(cfg)
+        index = GridIndex([self._element_bounds(el, base_dir) for el in elements])
+        files = [config_key] + [asset_key(p) for p in self._input_files(cfg, base_dir) if p.is_file()]
+        self._index_cache = (files, elements, index)
+        return elements, index
+
+    @staticmethod
+    def _files_unchanged(files: List[Tuple[str, int, int]]) -> bool:
+        """True if every (path, mtime, size) still matches the file on disk."""
+        try:
+            return all(asset_key(Path(key[0])) == key for key in files)
+        except OSError:
+            return False
+
+    # ---------- config ----------
+    def _load_config(self) -> Dict[str, Any]:
+        return load_config(self.config_path)
 
     def _validate_config(self, cfg: Dict[str, Any]) -> None:
-        if "canvas" not in cfg:
-            raise ValueError("Missing required key: canvas")
-        for k in ("width", "height", "background"):
-            if k not in cfg["canvas"]:
-                raise ValueError(f"Missing required key: canvas.{k}")
-
-        w, h = cfg["canvas"]["width"], cfg["canvas"]["height"]
-        if not (isinstance(w, int) and w > 0 and isinstance(h, int) and h > 0):
-            raise ValueError("canvas.width/height must be positive integers")
-
-        # Check for either 'elements' or 'layers'
-        has_elements = "elements" in cfg and isinstance(cfg["elements"], list)
-        has_layers = "layers" in cfg and isinstance(cfg["layers"], list)
-
-        if not has_elements and not has_layers:
-            raise ValueError("Missing required key: elements or layers (list)")
-
-        # Validate elements if present
-        if has_elements:
-            for i, el in enumerate(cfg["elements"]):
-                self._validate_element(el, i, "elements")
-
-        # Validate layers if present
-        if has_layers:
-            for layer_idx, layer in enumerate(cfg["layers"]):
-                if "elements" not in layer or not isinstance(layer["elements"], list):
-                    raise ValueError(f"layers[{layer_idx}] missing elements (list)")
-                for el_idx, el in enumerate(layer["elements"]):
-                    self._validate_element(el, el_idx, f"layers[{layer_idx}].elements")
-
-    def _validate_element(self, el: Dict[str, Any], idx: int, path: str) -> None:
-        """Validate a single element."""
-        if "type" not in el:
-            raise ValueError(f"{path}[{idx}] missing type")
-        if "x" not in el or "y" not in el:
-            raise ValueError(f"{path}[{idx}] missing x/y")
-        if el["type"] == "image":
-            if "path" not in el:
-                raise ValueError(f"{path}[{idx}] image missing path")
-            if "scale" in el and (not isinstance(el["scale"], (int, float)) or el["scale"] <= 0):
-                raise ValueError(f"{path}[{idx}] image scale must be > 0")
-        if el["type"] == "text":
-            if "text" not in el:
-                raise ValueError(f"{path}[{idx}] text missing text")
+        validate_config(cfg)
+
+    def _scale_config(self, cfg: Dict[str, Any], factor: float) -> Dict[str, Any]:
+        """Copy of cfg with canvas size, positions, image scales, font sizes and glow radii multiplied by factor."""
+        cfg = copy.deepcopy(cfg)
+        canvas = cfg["canvas"]
+        canvas["width"] = max(1, round(canvas["width"] * factor))
+        canvas["height"] = max(1, round(canvas["height"] * factor))
+
+        elements = list(cfg.get("elements", []))
+        for layer in cfg.get("layers", []) or []:
+            elements.extend(layer.get("elements", []))
+        for el in elements:
+            el["x"] = round(float(el["x"]) * factor)
+            el["y"] = round(float(el["y"]) * factor)
+            if el.get("type") == "image":
+                # crop is in source pixels and stays as is
+                el["scale"] = float(el.get("scale", 1.0)) * factor
+            elif el.get("type") == "text" and isinstance(el.get("font"), dict):
+                font_cfg = el["font"]
+                font_cfg["size"] = max(1, round(int(font_cfg.get("size", TextDefaults.FONT_SIZE)) * factor))
+                glow_cfg = font_cfg.get("glow")
+                if isinstance(glow_cfg, dict) and int(glow_cfg.get("radius", 10)) > 0:
+                    glow_cfg["radius"] = max(1, round(int(glow_cfg.get("radius", 10)) * factor))
+            elif el.get("type") == "text":
+                el["font"] = {"size": max(1, round(TextDefaults.FONT_SIZE * factor))}
+            elif el.get("type") == "shape":
+                for k in ("width", "height"):
+                    if k in el:
+                        el[k] = max(1, round(el[k] * factor))
+                if "points" in el:
+                    el["points"] = [[px * factor, py * factor] for px, py in el["points"]]
+                for k, default in (("stroke_width", ShapeDefaults.STROKE_WIDTH), ("radius", ShapeDefaults.RADIUS),
+                                   ("head_size", ShapeDefaults.HEAD_SIZE)):
+                    v = el.get(k, default)
+                    el[k] = max(1, round(v * factor)) if v > 0 else 0
+        return cfg
 
     def _assets_base_dir(self, cfg: Dict[str, Any]) -> Path:
         base_dir = cfg.get("assets", {}).get("base_dir", "")
@@ -104,11 +442,31 @@ class FigureRenderer:
     def _resolve_output_path(self, cfg: Dict[str, Any], override: str | Path | None) -> Path:
         if override is not None:
             return Path(override)
-        p = cfg.get("output", {}).get("path", "build/figure.png")
+        p = cfg.get("output", {}).get("path", OutputDefaults.PATH)
         return (self.config_path.parent / p).resolve()
 
+    def _input_files(self, cfg: Dict[str, Any], base_dir: Path) -> List[Path]:
+        """Asset and font files the rendered output depends on."""
+        files: List[Path] = []
+        fonts = set()
+        for el in self._get_all_elements(cfg):
+            if el.get("type") == "image" and "path" in el:
+                files.append((base_dir / el["path"]).resolve())
+            elif el.get("type") == "text":
+                font_cfg = el.get("font", {}) if isinstance(el.get("font", {}), dict) else {}
+                fonts.add((bool(font_cfg.get("bold", TextDefaults.BOLD)), font_cfg.get("family", None)))
+        for bold, family in sorted(fonts, key=str):
+            font_path = self._font_file(bold, family)
+            if font_path is not None:
+                files.append(font_path)
+        return files
+
     def _get_all_elements(self, cfg: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Get all elements from either layers or elements, sorted by layer order then element order."""
+        return [el for _, el in self._layered_elements(cfg)]
+
+    def _layered_elements(self, cfg: Dict[str, Any]) -> List[Tuple[int, Dict[str, Any]]]:
+        """(layer order, element) in draw order; legacy elements all get layer order 0."""
         if "layers" in cfg and isinstance(cfg["layers"], list) and cfg["layers"]:
             # Use layers if available
             all_elements: List[Tuple[int, int, Dict[str, Any]]] = []
@@ -121,17 +479,212 @@ class FigureRenderer:
 
             # Sort by layer_order first, then by el_order
             all_elements.sort(key=lambda x: (x[0], x[1]))
-            return [el for _, _, el in all_elements]
+            return [(layer_order, el) for layer_order, _, el in all_elements]
         else:
             # Fall back to elements (legacy mode)
-            return self._sorted_elements(cfg.get("elements", []))
+            return [(0, el) for el in self._sorted_elements(cfg.get("elements", []))]
+
+    def _layer_stack(self, cfg: Dict[str, Any], elements: List[Dict[str, Any]],
+                     base_dir: Path) -> List[Tuple[int, str]] | None:
+        """(end index in elements, snapshot key) for each layer order, bottom to top; None with one layer.
+
+        Layers sharing an order are interleaved by z, so they form one entry.
+        Each key hashes the canvas, the entry's elements and referenced asset
+        and font files, and the key of the entry below it, so a snapshot is
+        only reused while everything under it is unchanged.
+        """
+        orders = [order for order, _ in self._layered_elements(cfg)]
+        ends = [i for i in range(1, len(orders)) if orders[i] != orders[i - 1]] + [len(orders)]
+        if len(ends) < 2:
+            return None
+
+        stack: List[Tuple[int, str]] = []
+        key = config_digest({"canvas": cfg["canvas"], "base_dir": str(base_dir)})
+        start = 0
+        for end in ends:
+            group = elements[start:end]
+            files = [asset_key(p) for p in self._input_files({"elements": group}, base_dir) if p.is_file()]
+            key = config_digest({"below": key, "elements": group}, {"files": files})
+            stack.append((end, key))
+            start = end
+        return stack
 
     # ---------- rendering ----------
-    def _create_canvas(self, cfg: Dict[str, Any]) -> Image.Image:
+    def _create_canvas(self, cfg: Dict[str, Any], region: Tuple[int, int, int, int] | None = None) -> Image.Image:
         c = cfg["canvas"]
         w, h = c["width"], c["height"]
+        if region is not None:
+            w, h = region[2] - region[0], region[3] - region[1]
         bg = c.get("background", "#FFFFFF")
-        return Image.new("RGBA", (w, h), bg)
+        with self._profiler.span("canvas") as sp:
+            canvas = Image.new("RGBA", (w, h), bg)
+            sp.add_pixels(canvas)
+        return canvas
+
+    def _render_view(self, cfg: Dict[str, Any], elements: List[Dict[str, Any]], index: GridIndex,
+                     view: Tuple[int, int, int, int], base_dir: Path, draft: bool = False,
+                     stack: List[Tuple[int, str]] | None = None) -> Image.Image:
+        """Draw the elements intersecting view onto a new canvas the size of view.
+
+        With a layer stack (see _layer_stack), drawing resumes from the highest
+        cached snapshot of the layers below, and new snapshots are taken after
+        layers that were slow to draw. The topmost layer is never snapshotted.
+
+        Images are decoded and transformed on prefetch threads while earlier
+        elements are composited; compositing itself stays in draw order.
+        """
+        prof = self._profiler
+        indices = index.query_rect(view)
+        canvas = None
+        start = 0
+        boundaries: List[Tuple[int, str]] = []
+        if stack:
+            boundaries = stack[:-1]
+            for level in range(len(boundaries) - 1, -1, -1):
+                snapshot = self.layer_cache.get((view, draft, boundaries[level][1]))
+                if snapshot is not None:
+                    with prof.span("restore") as sp:
+                        canvas = snapshot.copy()
+                        sp.add_pixels(canvas)
+                    start = boundaries[level][0]
+                    boundaries = boundaries[level + 1:]
+                    self.layers_reused += level + 1
+                    break
+        if canvas is None:
+            canvas = self._create_canvas(cfg, view)
+        draw = ImageDraw.Draw(canvas)
+        indices = indices[bisect_left(indices, start):]
+        prefetcher = self._prefetcher(elements, indices, base_dir, draft)
+        try:
+            self._draw_elements(canvas, draw, elements, indices, view, base_dir, draft, boundaries, prefetcher)
+        finally:
+            if prefetcher is not None:
+                prefetcher.close()
+        return canvas
+
+    def _draw_elements(self, canvas: Image.Image, draw: ImageDraw.ImageDraw, elements: List[Dict[str, Any]],
+                       indices: List[int], view: Tuple[int, int, int, int], base_dir: Path, draft: bool,
+                       boundaries: List[Tuple[int, str]], prefetcher: Prefetcher[Image.Image] | None) -> None:
+        """Draw elements[i] for i in indices onto a view canvas, snapshotting at slow layer boundaries."""
+        prof = self._profiler
+        # Draw elements (already sorted by layer order and element order)
+        next_boundary = 0
+        last_snapshot = time.perf_counter()
+        for i in indices:
+            if next_boundary < len(boundaries) and i >= boundaries[next_boundary][0]:
+                # Crossed into a higher layer: keep the canvas so far if it was slow to draw
+                while next_boundary < len(boundaries) and i >= boundaries[next_boundary][0]:
+                    next_boundary += 1
+                if time.perf_counter() - last_snapshot >= LAYER_SNAPSHOT_MIN_SECONDS:
+                    with prof.span("snapshot") as sp:
+                        self.layer_cache.put((view, draft, boundaries[next_boundary - 1][1]), canvas.copy())
+                        sp.add_pixels(canvas)
+                    last_snapshot = time.perf_counter()
+            el = elements[i]
+            if view[:2] != (0, 0):
+                # Draw in view coordinates
+                el = {**el, "x": int(el["x"]) - view[0], "y": int(el["y"]) - view[1]}
+            if prof.enabled:
+                with prof.element(self._element_label(el, i)):
+                    self._draw_element(canvas, draw, el, base_dir, draft, self._prefetched(prefetcher, el, i),
+                                       view[:2])
+            else:
+                self._draw_element(canvas, draw, el, base_dir, draft, self._prefetched(prefetcher, el, i), view[:2])
+
+    def _prefetcher(self, elements: List[Dict[str, Any]], indices: List[int], base_dir: Path,
+                    draft: bool) -> Prefetcher[Image.Image] | None:
+        """Prefetcher loading the images among elements[indices] in draw order; None if there is nothing to load."""
+        images = [i for i in indices if elements[i]["type"] == "image"]
+        if self.prefetch_workers == 0 or not images:
+            return None
+        # Tasks for the same file run in order, so its decode is shared through the asset cache
+        tasks = [(i, elements[i]["path"],
+                  partial(self._prefetch_image, elements[i], self._element_label(elements[i], i), base_dir, draft))
+                 for i in images]
+        return Prefetcher(tasks, workers=min(self.prefetch_workers, len(images)),
+                          depth=self.prefetch_workers * PREFETCH_DEPTH)
+
+    def _prefetch_image(self, el: Dict[str, Any], label: str, base_dir: Path, draft: bool) -> Image.Image:
+        with self._profiler.attribute(label):
+            return self._load_element_image(el, base_dir, draft)
+
+    def _prefetched(self, prefetcher: Prefetcher[Image.Image] | None, el: Dict[str, Any],
+                    i: int) -> Image.Image | None:
+        """The prefetched image of elements[i], waiting for it if needed; None if it was not prefetched."""
+        if prefetcher is None or el["type"] != "image":
+            return None
+        with self._profiler.span("wait"):
+            return prefetcher.result(i)
+
+    @staticmethod
+    def _element_label(el: Dict[str, Any], i: int) -> str:
+        """Name of an element in profiles: its id, or "<type>#<draw index>"."""
+        return str(el.get("id", f"{el['type']}#{i}"))
+
+    def _draw_element(self, canvas: Image.Image, draw: ImageDraw.ImageDraw, el: Dict[str, Any], base_dir: Path,
+                      draft: bool = False, img: Image.Image | None = None,
+                      origin: Tuple[int, int] = (0, 0)) -> None:
+        el_type = el["type"]
+        if el_type == "image":
+            self._draw_image(canvas, el, base_dir, draft, img)
+        elif el_type == "text":
+            self._draw_text(draw, el)
+        elif el_type == "shape":
+            self._draw_shape(draw, el, origin)
+        else:
+            raise ValueError(f"Unknown element type: {el_type}")
+
+    # ---------- extents ----------
+    def _element_bounds(self, el: Dict[str, Any], base_dir: Path) -> Tuple[int, int, int, int]:
+        """Canvas box (left, top, right, bottom) the element can draw into, after scale/rotation/anchor."""
+        el_type = el["type"]
+        if el_type == "image":
+            return self._image_bounds(el, base_dir)
+        if el_type == "text":
+            return self._text_bounds(el)
+        if el_type == "shape":
+            st = self._shape_settings(el)
+            return self._placement(*st["size"], st["x"], st["y"], st["rotation"], st["anchor_v"], st["anchor_h"])
+        raise ValueError(f"Unknown element type: {el_type}")
+
+    def _image_bounds(self, el: Dict[str, Any], base_dir: Path) -> Tuple[int, int, int, int]:
+        src_path = self._image_path(el, base_dir)
+        scale = float(el.get("scale", 1.0))
+        rotation = float(el.get("rotation", ImageDefaults.ROTATION))
+        anchor_v = el.get("anchor_v", ImageDefaults.ANCHOR_VERTICAL)
+        anchor_h = el.get("anchor_h", ImageDefaults.ANCHOR_HORIZONTAL)
+
+        # Only the header is read here; pixels are decoded when drawing
+        with Image.open(src_path) as src:
+            w, h = src.size
+        crop = self._image_crop(el)
+        if crop is not None:
+            left, top, right, bottom = self._crop_box((w, h), crop, el.get("id", "?"))
+            w, h = right - left, bottom - top
+        if scale != 1.0:
+            w, h = max(1, int(w * scale)), max(1, int(h * scale))
+        return self._placement(w, h, int(el["x"]), int(el["y"]), rotation, anchor_v, anchor_h)
+
+    def _text_bounds(self, el: Dict[str, Any]) -> Tuple[int, int, int, int]:
+        x, y = int(el["x"]), int(el["y"])
+        text = str(el["text"])
+        st = self._text_settings(el)
+        font = self._load_font(st["size"], st["bold"], st["family"])
+
+        # Measured only: masks are rasterized when (and if) the element is drawn
+        align = st["align"] if "\n" in text else "left"
+        if not st["needs_compositing"]:
+            # Drawn directly through the anchored mask
+            left, top, right, bottom = _text_box(text, font, align, st["anchor_str"])
+            return (x + left, y + top, x + right, y + bottom)
+
+        left, top, right, bottom = _text_box(text, font, align, "la")
+        w, h = right - left, bottom - top
+        if st["glow"]:
+            # The glow never reaches past its layout box
+            pad = int(st["glow"].get("radius", 10)) * GLOW_LAYOUT_MARGIN
+            w, h = w + pad * 2, h + pad * 2
+        return self._placement(w, h, x, y, st["rotation"], st["anchor_v"], st["anchor_h"])
 
     def _sorted_elements(self, elements: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         # if z exists, sort by z, else keep original order (stable)
@@ -142,193 +695,543 @@ class FigureRenderer:
         # stable sort: Python sort is stable, so original order preserved within same z
         return sorted(elements, key=key)
 
-    def _draw_image(self, canvas: Image.Image, el: Dict[str, Any], base_dir: Path) -> None:
-        rel = el["path"]
-        src_path = (base_dir / rel).resolve()
+    def _image_path(self, el: Dict[str, Any], base_dir: Path) -> Path:
+        src_path = (base_dir / el["path"]).resolve()
         if not src_path.exists():
             el_id = el.get("id", "?")
             raise FileNotFoundError(f"Image not found (id={el_id}): {src_path}")
+        return src_path
 
-        img = Image.open(src_path).convert("RGBA")
-
-        # Get image settings
-        scale = float(el.get("scale", 1.0))
+    def _draw_image(self, canvas: Image.Image, el: Dict[str, Any], base_dir: Path, draft: bool = False,
+                    img: Image.Image | None = None) -> None:
+        """Composite an image element; img is its already loaded (prefetched) image, if any."""
+        if img is None:
+            img = self._load_element_image(el, base_dir, draft)
         alpha = int(el.get("alpha", ImageDefaults.ALPHA))
-        rotation = float(el.get("rotation", ImageDefaults.ROTATION))
         anchor_v = el.get("anchor_v", ImageDefaults.ANCHOR_VERTICAL)
         anchor_h = el.get("anchor_h", ImageDefaults.ANCHOR_HORIZONTAL)
 
-        # Apply scale
-        if scale != 1.0:
-            new_w = max(1, int(img.width * scale))
-            new_h = max(1, int(img.height * scale))
-            img = img.resize((new_w, new_h), resample=Image.Resampling.LANCZOS)
-
-        # Apply alpha if not fully opaque
-        if alpha < 255:
-            # Apply alpha channel multiplication
-            alpha_factor = alpha / 255.0
-            img_data = img.getdata()
-            new_data = []
-            for item in img_data:
-                # item is (R, G, B, A)
-                new_alpha = int(item[3] * alpha_factor)
-                new_data.append((item[0], item[1], item[2], new_alpha))
-            img.putdata(new_data)
-
-        # Apply rotation if specified
-        if rotation != 0:
-            img = img.rotate(rotation, expand=True, resample=Image.Resampling.BICUBIC)
-
         # Calculate anchor offset
         offset_x, offset_y = self._calculate_anchor_offset(img.width, img.height, anchor_v, anchor_h)
 
         # Composite image at position with anchor offset
         x, y = int(el["x"]), int(el["y"])
-        canvas.alpha_composite(img, dest=(x - offset_x, y - offset_y))
+        self._composite_image(canvas, img, x - offset_x, y - offset_y, alpha)
+
+    def _load_element_image(self, el: Dict[str, Any], base_dir: Path, draft: bool = False) -> Image.Image:
+        """Decoded and transformed image of an image element (safe to call from prefetch threads)."""
+        src_path = self._image_path(el, base_dir)
+        scale = float(el.get("scale", 1.0))
+        rotation = float(el.get("rotation", ImageDefaults.ROTATION))
+        return self._load_image(src_path, scale, rotation, draft, self._image_crop(el))
+
+    @staticmethod
+    def _image_crop(el: Dict[str, Any]) -> Tuple[int, int, int, int] | None:
+        """(left, top, right, bottom) trim lengths of an image element, or None if it is not cropped."""
+        crop = el.get("crop")
+        if not crop:
+            return None
+        trims = tuple(int(crop.get(k, 0)) for k in CROP_SIDES)
+        return trims if any(trims) else None  # type: ignore[return-value]
+
+    @staticmethod
+    def _crop_box(size: Tuple[int, int], crop: Tuple[int, int, int, int],
+                  el_id: str = "?") -> Tuple[int, int, int, int]:
+        """Source box (left, top, right, bottom) left after trimming crop from an image of size."""
+        left, top, right, bottom = crop
+        w, h = size
+        if left + right >= w or top + bottom >= h:
+            raise ValueError(f"Image crop leaves no pixels (id={el_id}): {crop} of {w}x{h}")
+        return (left, top, w - right, h - bottom)
+
+    @staticmethod
+    def _decode_rows_until(src: Image.Image, bottom: int) -> None:
+        """Make an opened (not yet loaded) image decode only its first bottom rows, where the format allows.
+
+        Applies to single-tile images whose decoder fills rows top to bottom
+        (non-interlaced PNG, uncompressed TIFF/PPM); other images are decoded
+        in full.
+        """
+        if bottom >= src.height or len(src.tile) != 1 or src.info.get("interlace"):
+            return
+        tile = src.tile[0]
+        if tile[0] not in ROW_DECODERS or tuple(tile[1]) != (0, 0) + src.size:
+            return
+        args = tile[3]
+        if tile[0] == "raw" and isinstance(args, tuple) and len(args) > 2 and args[2] != 1:
+            return  # stored bottom-up (e.g. BMP)
+        src.tile = [(tile[0], (0, 0, src.width, bottom)) + tuple(tile[2:])]
+        src._size = (src.width, bottom)
+
+    def _load_image(self, src_path: Path, scale: float, rotation: float, draft: bool = False,
+                    crop: Tuple[int, int, int, int] | None = None) -> Image.Image:
+        """Decode an asset and apply crop, scale and rotation, going through the asset cache.
+
+        crop trims (left, top, right, bottom) source pixels at decode time, so
+        scale and rotation only resample the part that is kept. Sources without
+        transparency stay RGB unless rotated by an angle that is not a multiple
+        of 90 degrees. Opacity is applied when compositing (_composite_image),
+        so elements differing only in alpha share one cached image.
+
+        With draft, downscaled assets are decoded at reduced resolution (JPEG
+        DCT scaling via Image.draft, Image.reduce otherwise) before the final
+        resample; faster, at slightly lower quality.
+
+        The returned image may be shared with the cache and must not be modified.
+        """
+        file_key = asset_key(src_path)
+        draft = draft and scale < 1.0
+        variant_key = (file_key, (scale, rotation, draft, crop))
+        transformed = scale != 1.0 or rotation != 0
+        if transformed:
+            img = self._cache_get(variant_key)
+            if img is not None:
+                return img
+            disk_key = None
+            if self.disk_cache is not None:
+                disk_key = (self.disk_cache.source_hash(file_key), variant_key[1])
+                with self._profiler.span("disk_read") as sp:
+                    img = self.disk_cache.get(disk_key)
+                    if img is not None:
+                        sp.add_pixels(img)
+                if img is not None:
+                    self.asset_cache.put(variant_key, img)
+                    return img
+
+        # Part of the decoded image to resample (a fractional crop of a reduced JPEG)
+        box = None
+        if draft:
+            img, (src_w, src_h) = self._decode_reduced(src_path, file_key, scale, crop)
+            box = img.info.get("box")
+        else:
+            img = self._decode_image(src_path, file_key, crop)
+            src_w, src_h = img.size
+
+        prof = self._profiler
+        size = (max(1, int(src_w * scale)), max(1, int(src_h * scale))) if scale != 1.0 else (src_w, src_h)
+        if rotation % 90 != 0:
+            with prof.span("transform") as sp:
+                img = self._affine_transform(img, size, rotation, box)
+                sp.add_pixels(img)
+        else:
+            if img.size != size or box is not None:
+                with prof.span("resize") as sp:
+                    img = img.resize(size, resample=Image.Resampling.LANCZOS, box=box)
+                    sp.add_pixels(img)
+            if rotation % 360 != 0:
+                # A lossless transpose for multiples of 90 degrees
+                with prof.span("rotate") as sp:
+                    img = img.rotate(rotation, expand=True)
+                    sp.add_pixels(img)
+
+        if transformed:
+            self.asset_cache.put(variant_key, img)
+            if disk_key is not None:
+                with self._profiler.span("disk_write"):
+                    self.disk_cache.put(disk_key, img)
+        return img
+
+    def _affine_transform(self, img: Image.Image, size: Tuple[int, int], rotation: float,
+                          box: Tuple[float, float, float, float] | None = None) -> Image.Image:
+        """img (or its part box) scaled to size, then rotated like Image.rotate(expand=True), as RGBA.
+
+        Enlarging (or not scaling) and rotating take a single bicubic affine
+        resample. The affine resample has no antialiasing filter, so shrinking
+        resizes with LANCZOS first. Both steps run on one premultiplied (RGBa)
+        copy instead of converting to and from it around each step.
+        """
+        if box is not None or size[0] < img.width or size[1] < img.height:
+            if img.mode == "RGB":
+                # Shrink before adding the alpha channel
+                img = img.resize(size, resample=Image.Resampling.LANCZOS, box=box).convert("RGBa")
+            else:
+                img = img.convert("RGBa").resize(size, resample=Image.Resampling.LANCZOS, box=box)
+        else:
+            img = img.convert("RGBa")
+
+        # Map output pixels back to img: rotate about the output center, then scale about img's center
+        out_w, out_h = self._rotated_size(size[0], size[1], rotation)
+        angle = -math.radians(rotation)
+        sx, sy = img.width / size[0], img.height / size[1]
+        a, b = math.cos(angle) * sx, math.sin(angle) * sx
+        d, e = -math.sin(angle) * sy, math.cos(angle) * sy
+        matrix = (a, b, (img.width - a * out_w - b * out_h) / 2, d, e, (img.height - d * out_w - e * out_h) / 2)
+        img = img.transform((out_w, out_h), Image.Transform.AFFINE, matrix, resample=Image.Resampling.BICUBIC)
+        return img.convert("RGBA")
+
+    def _decode_image(self, src_path: Path, file_key: Tuple[str, int, int],
+                      crop: Tuple[int, int, int, int] | None = None) -> Image.Image:
+        """Full-resolution RGB(A) decode of an asset, or of the part crop keeps (cached)."""
+        raw_key = (file_key, None if crop is None else ("crop", crop))
+        raw = self._cache_get(raw_key)
+        if raw is not None:
+            return raw
+        full = self.asset_cache.get((file_key, None)) if crop is not None else None
+        with self._profiler.span("decode") as sp:
+            if full is not None:
+                # Another element already decoded the whole file
+                raw = full.crop(self._crop_box(full.size, crop))
+            else:
+                with Image.open(src_path) as src:
+                    mode = self._decode_mode(src)
+                    if crop is None:
+                        raw = src.convert(mode)
+                    else:
+                        box = self._crop_box(src.size, crop)
+                        self._decode_rows_until(src, box[3])
+                        # Convert only the kept pixels
+                        raw = src.crop(box).convert(mode)
+            sp.add_pixels(raw)
+        self.asset_cache.put(raw_key, raw)
+        return raw
+
+    def _decode_reduced(self, src_path: Path, file_key: Tuple[str, int, int], scale: float,
+                        crop: Tuple[int, int, int, int] | None = None) -> Tuple[Image.Image, Tuple[int, int]]:
+        """RGB(A) decode at no less than scale x the (cropped) source size, and that size (cached).
+
+        When a JPEG crop does not fall on whole pixels of the DCT-reduced image,
+        the decode is rounded outwards and info["box"] holds the exact crop
+        within it, for the final resample.
+        """
+        raw_key = (file_key, ("reduced", scale, crop))
+        with Image.open(src_path) as src:
+            src_size = src.size
+            box = self._crop_box(src_size, crop) if crop is not None else (0, 0) + src_size
+            size = (box[2] - box[0], box[3] - box[1])
+            reduced = self._cache_get(raw_key)
+            if reduced is not None:
+                return reduced, size
+
+            with self._profiler.span("decode") as sp:
+                mode = self._decode_mode(src)
+                target = (max(1, int(size[0] * scale)), max(1, int(size[1] * scale)))
+                inner = None
+                if src.format == "JPEG":
+                    # Let libjpeg decode at 1/2, 1/4 or 1/8 size, never below target
+                    src.draft("RGB", (max(1, int(src_size[0] * scale)), max(1, int(src_size[1] * scale))))
+                    if src.size != src_size:
+                        # Crop box in the reduced image, rounded outwards, and the exact box inside that
+                        fx, fy = src.width / src_size[0], src.height / src_size[1]
+                        exact = (box[0] * fx, box[1] * fy, box[2] * fx, box[3] * fy)
+                        box = (math.floor(exact[0]), math.floor(exact[1]), math.ceil(exact[2]), math.ceil(exact[3]))
+                        inner = (exact[0] - box[0], exact[1] - box[1], exact[2] - box[0], exact[3] - box[1])
+                        if inner == (0, 0, box[2] - box[0], box[3] - box[1]):
+                            inner = None
+                else:
+                    self._decode_rows_until(src, box[3])
+                if box == (0, 0) + src.size:
+                    reduced = src.convert(mode)
+                else:
+                    reduced = src.crop(box).convert(mode)
+                sp.add_pixels(reduced)
+
+                # Integer box-downsample while staying at or above the target size
+                factor = min(reduced.width // target[0], reduced.height // target[1])
+                if factor >= 2:
+                    reduced = reduced.reduce(factor)
+                    sp.add_pixels(reduced)
+                    if inner is not None:
+                        inner = tuple(v / factor for v in inner)
+                reduced.info["box"] = inner
+        self.asset_cache.put(raw_key, reduced)
+        return reduced, size
+
+    @staticmethod
+    def _decode_mode(src: Image.Image) -> str:
+        """RGBA for sources with transparency, else RGB (a quarter less memory, no premultiplied resampling)."""
+        bands = src.getbands()
+        return "RGBA" if "A" in bands or "a" in bands or "transparency" in src.info else "RGB"
+
+    def _cache_get(self, key: Any) -> Optional[Image.Image]:
+        """Look up the asset cache, counting hits and misses for this renderer."""
+        img = self.asset_cache.get(key)
+        with self._lock:
+            if img is None:
+                self.asset_cache_misses += 1
+            else:
+                self.asset_cache_hits += 1
+        return img
+
+    def _text_settings(self, el: Dict[str, Any]) -> Dict[str, Any]:
+        """Font settings of a text element with defaults applied."""
+        font_cfg = el.get("font", {}) if isinstance(el.get("font", {}), dict) else {}
+        st: Dict[str, Any] = {
+            "size": int(font_cfg.get("size", TextDefaults.FONT_SIZE)),
+            "color": font_cfg.get("color", TextDefaults.FONT_COLOR),
+            "alpha": int(font_cfg.get("alpha", TextDefaults.ALPHA)),
+            "bold": bool(font_cfg.get("bold", TextDefaults.BOLD)),
+            "family": font_cfg.get("family", None),
+            "align": font_cfg.get("align", TextDefaults.TEXT_ALIGN),
+            "anchor_v": font_cfg.get("anchor_v", TextDefaults.ANCHOR_VERTICAL),
+            "anchor_h": font_cfg.get("anchor_h", TextDefaults.ANCHOR_HORIZONTAL),
+            "rotation": float(font_cfg.get("rotation", TextDefaults.ROTATION)),
+            "glow": font_cfg.get("glow", None) if isinstance(font_cfg.get("glow", {}), dict) else None,
+        }
+        # Anchor string for Pillow
+        st["anchor_str"] = TEXT_ANCHOR_H[st["anchor_h"]] + TEXT_ANCHOR_V[st["anchor_v"]]
+        # If alpha is not fully opaque, rotation is used, or glow is enabled, text is rendered to a temp image first
+        st["needs_compositing"] = st["alpha"] < 255 or st["rotation"] != 0 or st["glow"] is not None
+        return st
 
     def _draw_text(self, draw: ImageDraw.ImageDraw, el: Dict[str, Any]) -> None:
         x, y = int(el["x"]), int(el["y"])
         text = str(el["text"])
+        st = self._text_settings(el)
+        rgba_color = self._color_with_alpha(st["color"], st["alpha"])
+        font = self._load_font(st["size"], st["bold"], st["family"])
+        canvas = draw._image
+        prof = self._profiler
 
-        font_cfg = el.get("font", {}) if isinstance(el.get("font", {}), dict) else {}
-        size = int(font_cfg.get("size", TextDefaults.FONT_SIZE))
-        color = font_cfg.get("color", TextDefaults.FONT_COLOR)
-        alpha = int(font_cfg.get("alpha", TextDefaults.ALPHA))
-        bold = bool(font_cfg.get("bold", TextDefaults.BOLD))
-        align = font_cfg.get("align", TextDefaults.TEXT_ALIGN)
-        anchor_v = font_cfg.get("anchor_v", TextDefaults.ANCHOR_VERTICAL)
-        anchor_h = font_cfg.get("anchor_h", TextDefaults.ANCHOR_HORIZONTAL)
-        rotation = float(font_cfg.get("rotation", TextDefaults.ROTATION))
-        glow_cfg = font_cfg.get("glow", None) if isinstance(font_cfg.get("glow", {}), dict) else None
-
-        # Convert color to RGBA format with alpha
-        rgba_color = self._color_with_alpha(color, alpha)
-
-        # Load TrueType font with specified size and bold setting
-        font = self._load_font(size, bold)
-
-        # Calculate anchor string for Pillow
-        anchor_map_v = {"top": "a", "middle": "m", "bottom": "s"}
-        anchor_map_h = {"left": "l", "center": "m", "right": "r"}
-        anchor_str = anchor_map_h[anchor_h] + anchor_map_v[anchor_v]
-
-        # If alpha is not fully opaque, rotation is used, or glow is enabled, render to temp image first
-        needs_compositing = alpha < 255 or rotation != 0 or glow_cfg is not None
-
-        # For multi-line text, handle alignment
-        if "\n" in text:
-            # Multi-line text with alignment
-            if needs_compositing:
-                # Render to a separate image first for alpha, rotation, or glow
-                temp_img = self._render_text_to_image(text, font, rgba_color, align)
-                
-                # Apply glow effect if specified
-                if glow_cfg:
-                    temp_img = self._apply_glow(temp_img, glow_cfg)
-                
-                if rotation != 0:
-                    temp_img = temp_img.rotate(rotation, expand=True, resample=Image.Resampling.BICUBIC)
-                
-                # Calculate position based on anchor
-                offset_x, offset_y = self._calculate_anchor_offset(temp_img.width, temp_img.height, anchor_v, anchor_h)
-                draw._image.alpha_composite(temp_img, dest=(x - offset_x, y - offset_y))
-            else:
-                # Non-rotated fully opaque multi-line text - direct draw
-                draw.multiline_text((x, y), text, fill=rgba_color, font=font, align=align, anchor=anchor_str)
+        if not st["needs_compositing"]:
+            # Opaque upright text: fill the color straight through the anchored mask
+            mask, (ox, oy) = self._text_mask(text, font, st["align"], st["anchor_str"])
+            if mask.width and mask.height:
+                with prof.span("composite"):
+                    canvas.paste(rgba_color, (x + ox, y + oy, x + ox + mask.width, y + oy + mask.height), mask)
+            return
+
+        # Alpha, rotation or glow: colorize the mask into its own layer first
+        mask, _ = self._text_mask(text, font, st["align"], "la")
+        with prof.span("colorize") as sp:
+            text_img = Image.new("RGBA", mask.size, (255, 255, 255, 0))
+            text_img.paste(rgba_color, (0, 0, mask.width, mask.height), mask)
+            sp.add_pixels(text_img)
+
+        pad = 0
+        if st["glow"]:
+            with prof.span("glow") as sp:
+                text_img, pad = self._apply_glow(text_img, st["glow"])
+                sp.add_pixels(text_img)
+        self._composite_transformed(canvas, text_img, x, y, st["rotation"], st["anchor_v"], st["anchor_h"], pad)
+
+    def _text_mask(self, text: str, font: ImageFont.FreeTypeFont | ImageFont.ImageFont, align: str,
+                   anchor: str) -> Tuple[Image.Image, Tuple[int, int]]:
+        """Coverage mask (L) of text tightly cropped to its ink box, and the box's offset from the anchor.
+
+        Masks are cached by (text, font, align, anchor), so repeated labels are
+        rasterized once. The returned mask is shared and must not be modified.
+        """
+        if "\n" not in text:
+            align = "left"  # align only affects multi-line layout
+        key = (text, font, align, anchor)
+        mask = _text_mask_cache.get(key)
+        if mask is not None:
+            return mask, mask.info["offset"]
+
+        left, top, right, bottom = _text_box(text, font, align, anchor)
+        with self._profiler.span("rasterize") as sp:
+            mask = Image.new("L", (right - left, bottom - top), 0)
+            if mask.width and mask.height:
+                mask_draw = ImageDraw.Draw(mask)
+                if "\n" in text:
+                    mask_draw.multiline_text((-left, -top), text, fill=255, font=font, align=align, anchor=anchor)
+                else:
+                    mask_draw.text((-left, -top), text, fill=255, font=font, anchor=anchor)
+            sp.add_pixels(mask)
+        mask.info["offset"] = (left, top)
+        _text_mask_cache.put(key, mask)
+        return mask, (left, top)
+
+    # ---------- shapes ----------
+    def _shape_settings(self, el: Dict[str, Any]) -> Dict[str, Any]:
+        """Geometry and style of a shape element with defaults applied.
+
+        The shape is drawn into a box of st["size"] that x, y, anchor_v and
+        anchor_h place like an image. For line shapes the box encloses the
+        points (kept relative to the element's x/y) and is placed by its center,
+        so rotation turns them about the middle of the shape.
+        """
+        shape = el["shape"]
+        alpha = int(el.get("alpha", ShapeDefaults.ALPHA))
+        fill = el.get("fill", ShapeDefaults.FILL)
+        stroke = el.get("stroke", ShapeDefaults.STROKE)
+        st: Dict[str, Any] = {
+            "shape": shape,
+            "fill": self._color_with_alpha(fill, alpha) if fill is not None and shape in BOX_SHAPES else None,
+            "stroke": self._color_with_alpha(stroke, alpha) if stroke is not None else None,
+            "stroke_width": round(el.get("stroke_width", ShapeDefaults.STROKE_WIDTH)),
+            "radius": round(el.get("radius", ShapeDefaults.RADIUS)),
+            "head_size": round(el.get("head_size", ShapeDefaults.HEAD_SIZE)) if shape == "arrow" else 0,
+            "rotation": float(el.get("rotation", ShapeDefaults.ROTATION)),
+        }
+        x, y = int(el["x"]), int(el["y"])
+        if shape in BOX_SHAPES:
+            st["size"] = (max(1, round(el["width"])), max(1, round(el["height"])))
+            st["points"] = None
+            st.update(x=x, y=y, anchor_v=el.get("anchor_v", ShapeDefaults.ANCHOR_VERTICAL),
+                      anchor_h=el.get("anchor_h", ShapeDefaults.ANCHOR_HORIZONTAL))
         else:
-            # Single-line text
-            if needs_compositing:
-                # Render to a separate image first for alpha, rotation, or glow
-                temp_img = self._render_text_to_image(text, font, rgba_color, "left")
-                
-                # Apply glow effect if specified
-                if glow_cfg:
-                    temp_img = self._apply_glow(temp_img, glow_cfg)
-                
-                if rotation != 0:
-                    temp_img = temp_img.rotate(rotation, expand=True, resample=Image.Resampling.BICUBIC)
-                
-                # Calculate position based on anchor
-                offset_x, offset_y = self._calculate_anchor_offset(temp_img.width, temp_img.height, anchor_v, anchor_h)
-                draw._image.alpha_composite(temp_img, dest=(x - offset_x, y - offset_y))
+            # Room for the line width and the arrow head around the points
+            pad = max(st["stroke_width"], st["head_size"]) // 2 + 1
+            xs = [float(p[0]) for p in el["points"]]
+            ys = [float(p[1]) for p in el["points"]]
+            left, top = math.floor(min(xs)) - pad, math.floor(min(ys)) - pad
+            w, h = math.ceil(max(xs)) + pad - left + 1, math.ceil(max(ys)) + pad - top + 1
+            st["size"] = (w, h)
+            st["points"] = [(px - left, py - top) for px, py in zip(xs, ys)]
+            st.update(x=x + left + w // 2, y=y + top + h // 2, anchor_v="middle", anchor_h="center")
+        # Opaque upright shapes are drawn straight onto the canvas
+        st["direct"] = alpha >= 255 and st["rotation"] % 360 == 0
+        return st
+
+    def _draw_shape(self, draw: ImageDraw.ImageDraw, el: Dict[str, Any], origin: Tuple[int, int] = (0, 0)) -> None:
+        """Draw a shape element; origin is the canvas position of draw's image (a band or region view)."""
+        st = self._shape_settings(el)
+        if st["fill"] is None and st["stroke"] is None:
+            return
+        w, h = st["size"]
+        prof = self._profiler
+
+        if st["direct"]:
+            left, top, right, bottom = self._placement(w, h, st["x"], st["y"], 0.0, st["anchor_v"], st["anchor_h"])
+            canvas = draw._image
+            inside = left >= 0 and top >= 0 and right <= canvas.width and bottom <= canvas.height
+            x0, y0 = left + origin[0], top + origin[1]
+            one_tile = x0 // SHAPE_TILE == (x0 + w - 1) // SHAPE_TILE and y0 // SHAPE_TILE == (y0 + h - 1) // SHAPE_TILE
+            # Boxes, and line shapes clipped nowhere, are drawn through the canvas's
+            # ImageDraw: no temporary image at all
+            if st["points"] is None or (inside and one_tile):
+                with prof.span("shape"):
+                    self._draw_shape_path(draw, st, left, top)
             else:
-                # Non-rotated fully opaque single-line text - direct draw
-                draw.text((x, y), text, fill=rgba_color, font=font, anchor=anchor_str)
-
-    def _render_text_to_image(self, text: str, font: ImageFont.FreeTypeFont | ImageFont.ImageFont,
-                               color: tuple[int, int, int, int], align: str) -> Image.Image:
-        """Render text to a temporary image for rotation."""
-        # Create a dummy draw to calculate text bounding box
-        dummy_img = Image.new("RGBA", (1, 1))
-        dummy_draw = ImageDraw.Draw(dummy_img)
-        
-        # Calculate text bounding box
-        if "\n" in text:
-            bbox = dummy_draw.multiline_textbbox((0, 0), text, font=font, align=align)
-        else:
-            bbox = dummy_draw.textbbox((0, 0), text, font=font)
-        
-        text_width = bbox[2] - bbox[0]
-        text_height = bbox[3] - bbox[1]
-        
-        # Create temporary image with padding
-        padding = 10
-        temp_img = Image.new("RGBA", (text_width + padding * 2, text_height + padding * 2), (255, 255, 255, 0))
-        temp_draw = ImageDraw.Draw(temp_img)
-        
-        # Draw text at the center of temp image
-        if "\n" in text:
-            temp_draw.multiline_text((padding - bbox[0], padding - bbox[1]), text, fill=color, font=font, align=align)
-        else:
-            temp_draw.text((padding - bbox[0], padding - bbox[1]), text, fill=color, font=font)
-        
-        # Crop to actual text size
-        return temp_img.crop((padding, padding, padding + text_width, padding + text_height))
+                self._draw_shape_tiles(canvas, st, left, top, origin)
+            return
+
+        # Alpha or rotation: rasterize into a layer the size of the shape's box, then composite it
+        with prof.span("rasterize") as sp:
+            rgb = (st["stroke"] or st["fill"])[:3]
+            layer = Image.new("RGBA", (w, h), rgb + (0,))
+            self._draw_shape_path(ImageDraw.Draw(layer), st, 0, 0)
+            sp.add_pixels(layer)
+        self._composite_transformed(draw._image, layer, st["x"], st["y"], st["rotation"], st["anchor_v"],
+                                    st["anchor_h"])
+
+    def _draw_shape_tiles(self, canvas: Image.Image, st: Dict[str, Any], left: int, top: int,
+                          origin: Tuple[int, int]) -> None:
+        """Draw an opaque line shape with its box at (left, top) of canvas, one SHAPE_TILE grid cell at a time.
+
+        Each cell is rasterized on its own, clipped to the cell and the shape's
+        box, which lie at the same canvas positions whatever the view: a band or
+        region gets the same pixels as the full render. Only cells inside the
+        view that a (padded) segment of the path passes through are drawn.
+        """
+        w, h = st["size"]
+        ox, oy = origin
+        box = (left + ox, top + oy, left + ox + w, top + oy + h)
+        # Part of the shape's box inside the view, in canvas coordinates
+        bounds = (max(box[0], ox), max(box[1], oy), min(box[2], ox + canvas.width), min(box[3], oy + canvas.height))
+        pad = max(st["stroke_width"], st["head_size"]) // 2 + 1
+        points = [(px + box[0], py + box[1]) for px, py in st["points"]]
+        cells = set()
+        for (ax, ay), (bx, by) in zip(points, points[1:]):
+            x0, y0 = max(math.floor(min(ax, bx)) - pad, bounds[0]), max(math.floor(min(ay, by)) - pad, bounds[1])
+            x1, y1 = min(math.ceil(max(ax, bx)) + pad + 1, bounds[2]), min(math.ceil(max(ay, by)) + pad + 1, bounds[3])
+            if x0 < x1 and y0 < y1:
+                # Cells whose center is close enough to the segment for the cell to reach its stroke
+                reach = pad + SHAPE_TILE * 0.71
+                cells.update((cx, cy) for cx in range(x0 // SHAPE_TILE, (x1 - 1) // SHAPE_TILE + 1)
+                             for cy in range(y0 // SHAPE_TILE, (y1 - 1) // SHAPE_TILE + 1)
+                             if _segment_distance(((cx + 0.5) * SHAPE_TILE, (cy + 0.5) * SHAPE_TILE),
+                                                  (ax, ay), (bx, by)) <= reach)
+
+        rgb = st["stroke"][:3]
+        with self._profiler.span("rasterize") as sp:
+            for cx, cy in sorted(cells):
+                # Rasterized area: the cell within the shape's box; composited: its part inside the view
+                clip = (max(cx * SHAPE_TILE, box[0]), max(cy * SHAPE_TILE, box[1]),
+                        min((cx + 1) * SHAPE_TILE, box[2]), min((cy + 1) * SHAPE_TILE, box[3]))
+                part = (max(clip[0], bounds[0]), max(clip[1], bounds[1]),
+                        min(clip[2], bounds[2]), min(clip[3], bounds[3]))
+                layer = Image.new("RGBA", (clip[2] - clip[0], clip[3] - clip[1]), rgb + (0,))
+                self._draw_shape_path(ImageDraw.Draw(layer), st, box[0] - clip[0], box[1] - clip[1])
+                canvas.alpha_composite(layer, (part[0] - ox, part[1] - oy),
+                                       (part[0] - clip[0], part[1] - clip[1], part[2] - clip[0], part[3] - clip[1]))
+                sp.add_pixels(layer)
+
+    def _draw_shape_path(self, draw: ImageDraw.ImageDraw, st: Dict[str, Any], left: int, top: int) -> None:
+        """Draw a shape (see _shape_settings) with its box at (left, top) of draw's image."""
+        w, h = st["size"]
+        fill, stroke, width = st["fill"], st["stroke"], st["stroke_width"]
+        outline = stroke if width > 0 else None
+        box = (left, top, left + w - 1, top + h - 1)
+        shape = st["shape"]
+        if shape == "rect":
+            draw.rectangle(box, fill=fill, outline=outline, width=width)
+        elif shape == "rounded_rect":
+            draw.rounded_rectangle(box, radius=st["radius"], fill=fill, outline=outline, width=width)
+        elif shape == "ellipse":
+            draw.ellipse(box, fill=fill, outline=outline, width=width)
+        elif stroke is not None:
+            # Whole-pixel vertices: Pillow fills float polygons (wide lines, arrow
+            # heads) differently where they are clipped at a band or region edge
+            points = [_round_point((px + left, py + top)) for px, py in st["points"]]
+            head = None
+            if shape == "arrow" and st["head_size"] > 0:
+                head, points[-1] = self._arrow_head(points[-2], points[-1], st["head_size"])
+            if width > 0:
+                draw.line(points, fill=stroke, width=width, joint="curve" if len(points) > 2 else None)
+            if head is not None:
+                draw.polygon(head, fill=stroke)
 
-    def _apply_glow(self, text_img: Image.Image, glow_cfg: Dict[str, Any]) -> Image.Image:
-        """Apply glow effect to text image."""
+    @staticmethod
+    def _arrow_head(start: Tuple[float, float], tip: Tuple[float, float],
+                    size: int) -> Tuple[List[Tuple[int, int]] | None, Tuple[float, float]]:
+        """Triangle of an arrow head pointing at tip, and where the shaft should end so it stays under the head.
+
+        Both are rounded to whole pixels, like the other path vertices.
+        """
+        dx, dy = tip[0] - start[0], tip[1] - start[1]
+        length = math.hypot(dx, dy)
+        if length == 0:
+            return None, tip
+        ux, uy = dx / length, dy / length
+        bx, by = tip[0] - ux * size, tip[1] - uy * size
+        half = size / 2
+        head = [tip, (bx - uy * half, by + ux * half), (bx + uy * half, by - ux * half)]
+        back = min(size - 1, length)
+        end = (tip[0] - ux * back, tip[1] - uy * back)
+        return [_round_point(p) for p in head], _round_point(end)
+
+    def _apply_glow(self, text_img: Image.Image, glow_cfg: Dict[str, Any]) -> Tuple[Image.Image, int]:
+        """Apply glow effect to text image.
+
+        Returns the glow image and the extra padding (per side) that the
+        legacy 3x radius layout box adds beyond the pixels actually allocated.
+        """
         glow_color = glow_cfg.get("color", "#FFFFFF")
         glow_radius = int(glow_cfg.get("radius", 10))
         glow_alpha = int(glow_cfg.get("alpha", 200))
-        
-        # Create a larger canvas to accommodate the glow
-        margin = glow_radius * 3
+        glow_mode = glow_cfg.get("mode", "gaussian")
+        if glow_mode not in GLOW_MODES:
+            raise ValueError(f"Unknown glow mode: {glow_mode}")
+
+        # Only allocate as far as the blur can actually reach
+        blur_filter, margin = _glow_kernel(glow_radius, glow_mode)
         glow_width = text_img.width + margin * 2
         glow_height = text_img.height + margin * 2
-        
-        # Extract text alpha channel
-        text_alpha = text_img.split()[3]
-        
-        # Create a grayscale mask from text alpha for blurring
+
+        # Blur the text alpha channel to get the glow mask
         alpha_mask = Image.new("L", (glow_width, glow_height), 0)
-        alpha_mask.paste(text_alpha, (margin, margin))
-        
-        # Apply Gaussian blur to create glow effect
-        blurred_mask = alpha_mask.filter(ImageFilter.GaussianBlur(radius=glow_radius))
-        
-        # Create glow layer with the blurred mask
+        alpha_mask.paste(text_img.getchannel("A"), (margin, margin))
+        if blur_filter is not None:
+            alpha_mask = alpha_mask.filter(blur_filter)
+
+        # Glow color with the blurred mask scaled by glow_alpha as its alpha channel
         glow_r, glow_g, glow_b, _ = self._color_with_alpha(glow_color, 255)
-        glow_layer = Image.new("RGBA", (glow_width, glow_height), (0, 0, 0, 0))
-        
-        # Create glow color image and apply blurred mask with glow_alpha strength
-        glow_colored = Image.new("RGB", (glow_width, glow_height), (glow_r, glow_g, glow_b))
-        
-        # Create the glow alpha channel by scaling blurred mask with glow_alpha
-        glow_alpha_channel = Image.new("L", (glow_width, glow_height), 0)
-        glow_alpha_data = []
-        for pixel in blurred_mask.getdata():
-            # Scale the blurred mask value to glow_alpha
-            glow_alpha_data.append(int(pixel * glow_alpha / 255))
-        glow_alpha_channel.putdata(glow_alpha_data)
-        
-        # Merge color with alpha channel
-        glow_layer = Image.merge("RGBA", (glow_colored.split()[0], glow_colored.split()[1], glow_colored.split()[2], glow_alpha_channel))
-        
+        glow_layer = Image.new("RGBA", (glow_width, glow_height), (glow_r, glow_g, glow_b, 0))
+        glow_layer.putalpha(alpha_mask.point(self._alpha_lut(glow_alpha)))
+
         # Paste original text on top
         glow_layer.alpha_composite(text_img, dest=(margin, margin))
-        
-        return glow_layer
+
+        return glow_layer, glow_radius * GLOW_LAYOUT_MARGIN - margin
+
+    @staticmethod
+    def _alpha_lut(alpha: int) -> List[int]:
+        """Lookup table mapping a 0-255 alpha value to value * alpha/255 (truncated)."""
+        alpha = max(0, min(255, alpha))
+        factor = alpha / 255.0
+        return [int(v * factor) for v in range(256)]
 
     def _color_with_alpha(self, color: str, alpha: int) -> tuple[int, int, int, int]:
         """Convert hex color to RGBA tuple with alpha channel."""
@@ -354,6 +1257,93 @@ class FigureRenderer:
         
         return (r, g, b, alpha)
 
+    def _composite_transformed(self, canvas: Image.Image, img: Image.Image, x: int, y: int, rotation: float,
+                               anchor_v: str, anchor_h: str, pad: int = 0) -> None:
+        """Rotate img and composite it onto canvas with its anchor point at (x, y).
+
+        pad grows the box used for anchoring by that many transparent pixels per
+        side without allocating them; the image stays centered in that box.
+        """
+        left, top, _, _ = self._placement(img.width, img.height, x, y, rotation, anchor_v, anchor_h, pad)
+        if rotation != 0:
+            with self._profiler.span("rotate") as sp:
+                img = img.rotate(rotation, expand=True, resample=Image.Resampling.BICUBIC)
+                sp.add_pixels(img)
+        with self._profiler.span("composite"):
+            self._alpha_composite_clipped(canvas, img, left, top)
+
+    def _placement(self, width: int, height: int, x: int, y: int, rotation: float,
+                   anchor_v: str, anchor_h: str, pad: int = 0) -> Tuple[int, int, int, int]:
+        """Canvas box of a width x height image rotated and anchored at (x, y) (see _composite_transformed)."""
+        img_w, img_h = self._rotated_size(width, height, rotation)
+        layout_w, layout_h = self._rotated_size(width + pad * 2, height + pad * 2, rotation)
+
+        offset_x, offset_y = self._calculate_anchor_offset(layout_w, layout_h, anchor_v, anchor_h)
+        left = x - offset_x + (layout_w - img_w) // 2
+        top = y - offset_y + (layout_h - img_h) // 2
+        return (left, top, left + img_w, top + img_h)
+
+    def _composite_image(self, canvas: Image.Image, img: Image.Image, left: int, top: int, alpha: int) -> None:
+        """Composite an RGB or RGBA image at (left, top) with opacity alpha/255, clipped to the canvas.
+
+        Opaque RGB images are pasted in place. Otherwise the opacity goes into a
+        copy of the part inside the canvas only; img itself is never modified.
+        """
+        x0, y0 = max(0, -left), max(0, -top)
+        x1, y1 = min(img.width, canvas.width - left), min(img.height, canvas.height - top)
+        if x0 >= x1 or y0 >= y1 or alpha <= 0:
+            return
+        if alpha >= 255:
+            with self._profiler.span("composite"):
+                if img.mode == "RGB":
+                    canvas.paste(img, (left, top))
+                else:
+                    self._alpha_composite_clipped(canvas, img, left, top)
+            return
+
+        with self._profiler.span("alpha") as sp:
+            visible = img if (x0, y0, x1, y1) == (0, 0) + img.size else img.crop((x0, y0, x1, y1))
+            lut = self._alpha_lut(alpha)
+            if visible.mode == "RGB":
+                visible = visible.convert("RGBA")
+                visible.putalpha(lut[255])
+            else:
+                mask = visible.getchannel("A").point(lut)
+                if visible is img:
+                    visible = img.copy()
+                visible.putalpha(mask)
+            sp.add_pixels(visible)
+        with self._profiler.span("composite"):
+            canvas.alpha_composite(visible, dest=(left + x0, top + y0))
+
+    @staticmethod
+    def _alpha_composite_clipped(canvas: Image.Image, img: Image.Image, left: int, top: int) -> None:
+        """alpha_composite img at (left, top), clipping whatever falls outside the canvas."""
+        src_x, src_y = max(0, -left), max(0, -top)
+        if src_x >= img.width or src_y >= img.height or left >= canvas.width or top >= canvas.height:
+            return
+        canvas.alpha_composite(img, dest=(left + src_x, top + src_y), source=(src_x, src_y))
+
+    @staticmethod
+    def _rotated_size(width: int, height: int, rotation: float) -> tuple[int, int]:
+        """Size of a width x height box after Image.rotate(rotation, expand=True)."""
+        angle = rotation % 360.0
+        if angle in (0.0, 180.0):
+            return width, height
+        if angle in (90.0, 270.0):
+            return height, width
+
+        # Same corner transform Pillow uses to size the expanded image
+        rad = -math.radians(angle)
+        cos_a, sin_a = round(math.cos(rad), 15), round(math.sin(rad), 15)
+        cx, cy = width / 2.0, height / 2.0
+        xs, ys = [], []
+        for px, py in ((0, 0), (width, 0), (width, height), (0, height)):
+            xs.append(cos_a * (px - cx) + sin_a * (py - cy) + cx)
+            ys.append(-sin_a * (px - cx) + cos_a * (py - cy) + cy)
+        return (math.ceil(max(xs)) - math.floor(min(xs)),
+                math.ceil(max(ys)) - math.floor(min(ys)))
+
     def _calculate_anchor_offset(self, width: int, height: int, anchor_v: str, anchor_h: str) -> tuple[int, int]:
         """Calculate offset based on anchor point."""
         offset_x = 0
@@ -373,27 +1363,18 @@ class FigureRenderer:
         
         return offset_x, offset_y
 
-    def _load_font(self, size: int, bold: bool = False) -> ImageFont.FreeTypeFont | ImageFont.ImageFont:
-        """Load a TrueType font with the specified size and bold setting."""
-        # Choose font paths based on bold setting
-        font_paths = TextDefaults.BOLD_FONT_PATHS if bold else TextDefaults.FONT_PATHS
-        
-        # Try to use system fonts from defaults
-        for font_path in font_paths:
-            if font_path.exists():
-                try:
-                    return ImageFont.truetype(str(font_path), size=size)
-                except Exception:
-                    continue
-
-        # If bold font not found, try regular fonts
-        if bold:
-            for font_path in TextDefaults.FONT_PATHS:
-                if font_path.exists():
-                    try:
-                        return ImageFont.truetype(str(font_path), size=size)
-                    except Exception:
-                        continue
-
-        # Fallback to default font if no TrueType font is found
-        return ImageFont.load_default()
+    def _load_font(self, size: int, bold: bool = False,
+                   family: str | None = None) -> ImageFont.FreeTypeFont | ImageFont.ImageFont:
+        """Load a TrueType font with the specified size and bold setting (cached per file and size)."""
+        # A font file given as family is relative to the config file directory
+        return load_font(size, bold, self._resolve_family(family))
+
+    def _font_file(self, bold: bool, family: str | None) -> Path | None:
+        """Font file that _load_font() uses for bold/family, if any."""
+        return font_file(bold, self._resolve_family(family))
+
+    def _resolve_family(self, family: str | None) -> str | None:
+        # A font file given as family is relative to the config file directory
+        if family and Path(family).suffix.lower() in FONT_SUFFIXES:
+            return str((self.config_path.parent / Path(family).expanduser()).resolve())
+        return family
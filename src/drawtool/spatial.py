@@ -0,0 +1,78 @@
+"""Uniform-grid spatial index over element bounding boxes."""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import Dict, List, Sequence, Set, Tuple
+
+
+# (left, top, right, bottom) in canvas pixels; right/bottom are exclusive
+Box = Tuple[int, int, int, int]
+
+DEFAULT_CELL_SIZE: int = 256
+
+# Boxes covering more cells than this are kept in a list checked on every query
+MAX_CELLS_PER_BOX: int = 1024
+
+
+def intersects(a: Box, b: Box) -> bool:
+    """True if two boxes overlap by at least one pixel."""
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+class GridIndex:
+    """Buckets boxes into square grid cells for fast point and rectangle queries.
+
+    Query results are box indexes in ascending order, i.e. in the order the
+    boxes were given.
+    """
+
+    def __init__(self, boxes: Sequence[Box], cell_size: int = DEFAULT_CELL_SIZE) -> None:
+        if cell_size <= 0:
+            raise ValueError("cell_size must be > 0")
+        self.boxes: List[Box] = list(boxes)
+        self.cell_size = cell_size
+        self._cells: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        self._large: List[int] = []
+        for i, box in enumerate(self.boxes):
+            self._insert(i, box)
+
+    def __len__(self) -> int:
+        return len(self.boxes)
+
+    def query_point(self, x: int, y: int) -> List[int]:
+        """Indexes of boxes containing pixel (x, y)."""
+        return self.query_rect((x, y, x + 1, y + 1))
+
+    def query_rect(self, rect: Box) -> List[int]:
+        """Indexes of boxes intersecting rect."""
+        if rect[2] <= rect[0] or rect[3] <= rect[1]:
+            return []
+        cx0, cy0, cx1, cy1 = self._cell_range(rect)
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > len(self.boxes):
+            # Visiting the cells would cost more than checking every box
+            candidates: Set[int] | range = range(len(self.boxes))
+        else:
+            candidates = set(self._large)
+            for cy in range(cy0, cy1 + 1):
+                for cx in range(cx0, cx1 + 1):
+                    bucket = self._cells.get((cx, cy))
+                    if bucket:
+                        candidates.update(bucket)
+        return sorted(i for i in candidates if intersects(self.boxes[i], rect))
+
+    def _insert(self, i: int, box: Box) -> None:
+        if box[2] <= box[0] or box[3] <= box[1]:
+            return  # empty boxes never match
+        cx0, cy0, cx1, cy1 = self._cell_range(box)
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > MAX_CELLS_PER_BOX:
+            self._large.append(i)
+            return
+        for cy in range(cy0, cy1 + 1):
+            for cx in range(cx0, cx1 + 1):
+                self._cells[(cx, cy)].append(i)
+
+    def _cell_range(self, box: Box) -> Tuple[int, int, int, int]:
+        """Inclusive range of cells covered by box."""
+        c = self.cell_size
+        return (box[0] // c, box[1] // c, (box[2] - 1) // c, (box[3] - 1) // c)
@@ -0,0 +1,128 @@
+"""Incremental PNG writer for images rendered in horizontal bands."""
+
+from __future__ import annotations
+
+import os
+import struct
+import zlib
+from pathlib import Path
+from types import TracebackType
+from typing import Optional, Tuple, Type
+
+from PIL import Image, ImageChops
+
+
+# PNG color types per Pillow mode
+_COLOR_TYPES = {"L": 0, "RGB": 2, "RGBA": 6}
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# Target size of each IDAT chunk written
+_IDAT_SIZE = 1 << 20
+
+# PNG row filter "Up": each byte minus the byte above it
+_FILTER_UP = b"\x02"
+
+_METERS_PER_INCH = 0.0254
+
+
+class PngStreamWriter:
+    """Write a PNG top to bottom, one band of rows at a time.
+
+    Only the current band and one row of the previous band are held in
+    memory. The file is written to a temporary name and moved into place
+    on close(), so a failed render never leaves a truncated PNG behind.
+
+    Usage::
+
+        with PngStreamWriter(path, width, height) as writer:
+            for band in bands:
+                writer.write(band)
+    """
+
+    def __init__(self, path: str | Path, width: int, height: int, mode: str = "RGBA",
+                 compress_level: int = 6, dpi: Optional[Tuple[float, float]] = None) -> None:
+        if mode not in _COLOR_TYPES:
+            raise ValueError(f"Unsupported PNG stream mode: {mode}")
+        self.path = Path(path)
+        self.width = width
+        self.height = height
+        self.mode = mode
+        self.rows_written = 0
+        self._prev_row: Optional[Image.Image] = None
+        self._compressor = zlib.compressobj(compress_level)
+        self._pending = bytearray()
+        self._tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        self._file = self._tmp.open("wb")
+        self._file.write(_PNG_SIGNATURE)
+        self._chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, _COLOR_TYPES[mode], 0, 0, 0))
+        if dpi is not None:
+            # Pixels per meter, rounded as Pillow's PNG encoder does
+            self._chunk(b"pHYs", struct.pack(">IIB", *(int(d / _METERS_PER_INCH + 0.5) for d in dpi), 1))
+
+    def write(self, band: Image.Image) -> None:
+        """Append the next band of rows (full image width)."""
+        if band.mode != self.mode or band.width != self.width:
+            raise ValueError(f"Band must be {self.mode} and {self.width} px wide")
+        if self.rows_written + band.height > self.height:
+            raise ValueError("More rows written than the image height")
+
+        # Row above each row of the band, for the Up filter (zeros above the first row)
+        above = Image.new(self.mode, band.size, 0)
+        if self._prev_row is not None:
+            above.paste(self._prev_row, (0, 0))
+        if band.height > 1:
+            above.paste(band.crop((0, 0, band.width, band.height - 1)), (0, 1))
+        filtered = ImageChops.subtract_modulo(band, above).tobytes()
+
+        stride = len(filtered) // band.height
+        rows = bytearray()
+        for y in range(band.height):
+            rows += _FILTER_UP
+            rows += filtered[y * stride:(y + 1) * stride]
+        self._pending += self._compressor.compress(bytes(rows))
+        self._flush_idat(final=False)
+
+        self._prev_row = band.crop((0, band.height - 1, band.width, band.height))
+        self.rows_written += band.height
+
+    def close(self) -> None:
+        """Finish the PNG and move it to its final path."""
+        if self._file.closed:
+            return
+        if self.rows_written != self.height:
+            self.abort()
+            raise ValueError(f"Wrote {self.rows_written} of {self.height} rows")
+        self._pending += self._compressor.flush()
+        self._flush_idat(final=True)
+        self._chunk(b"IEND", b"")
+        self._file.close()
+        os.replace(self._tmp, self.path)
+
+    def abort(self) -> None:
+        """Discard the partially written file."""
+        if not self._file.closed:
+            self._file.close()
+        self._tmp.unlink(missing_ok=True)
+
+    def __enter__(self) -> PngStreamWriter:
+        return self
+
+    def __exit__(self, exc_type: Optional[Type[BaseException]], exc: Optional[BaseException],
+                 tb: Optional[TracebackType]) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def _flush_idat(self, final: bool) -> None:
+        while len(self._pending) >= _IDAT_SIZE or (final and self._pending):
+            data = bytes(self._pending[:_IDAT_SIZE])
+            del self._pending[:_IDAT_SIZE]
+            self._chunk(b"IDAT", data)
+
+    def _chunk(self, kind: bytes, data: bytes) -> None:
+        self._file.write(struct.pack(">I", len(data)))
+        self._file.write(kind)
+        self._file.write(data)
+        self._file.write(struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF))
@@ -3,7 +3,9 @@ from dataclasses import dataclass
 from typing import Literal, Optional, TypedDict, List, Dict, Any
 
 
-ElementType = Literal["image", "text"]
+ElementType = Literal["image", "text", "shape"]
+
+ShapeKind = Literal["rect", "rounded_rect", "ellipse", "line", "polyline", "arrow"]
 
 
 class CanvasCfg(TypedDict):
@@ -14,6 +16,19 @@ class CanvasCfg(TypedDict):
 
 class OutputCfg(TypedDict, total=False):
     path: str
+    format: Literal["png", "jpeg", "webp", "tiff"]
+    preset: Literal["draft", "final"]
+    flatten: bool | Literal["auto"]
+    compress_level: int  # PNG, 0-9
+    optimize: bool  # PNG, JPEG
+    quality: int  # JPEG, WebP, 1-100
+    lossless: bool  # WebP
+    method: int  # WebP, 0-6
+    compression: Literal["raw", "tiff_lzw", "tiff_deflate", "tiff_adobe_deflate"]  # TIFF
+    dpi: float  # PNG, JPEG, TIFF
+    # Part of the canvas and size written (also allowed in a single output object)
+    scale: float  # 0 < scale <= 1
+    region: List[int]  # [x0, y0, x1, y1] in canvas coordinates
 
 
 class AssetsCfg(TypedDict, total=False):
@@ -24,6 +39,7 @@ class GlowCfg(TypedDict, total=False):
     color: str
     radius: int
     alpha: int
+    mode: Literal["gaussian", "box"]
 
 
 class FontCfg(TypedDict, total=False):
@@ -47,9 +63,18 @@ class BaseElementCfg(TypedDict, total=False):
     z: int
 
 
+class CropCfg(TypedDict, total=False):
+    # Source pixels trimmed from each side
+    left: int
+    top: int
+    right: int
+    bottom: int
+
+
 class ImageElementCfg(BaseElementCfg, total=False):
     type: Literal["image"]
     path: str
+    crop: CropCfg
     scale: float
     alpha: int
     rotation: float
@@ -63,6 +88,23 @@ class TextElementCfg(BaseElementCfg, total=False):
     font: FontCfg
 
 
+class ShapeElementCfg(BaseElementCfg, total=False):
+    type: Literal["shape"]
+    shape: ShapeKind
+    width: int  # rect, rounded_rect, ellipse
+    height: int  # rect, rounded_rect, ellipse
+    points: List[List[float]]  # line, polyline, arrow: [[dx, dy], ...] relative to (x, y)
+    fill: Optional[str]
+    stroke: Optional[str]
+    stroke_width: int
+    radius: int  # rounded_rect
+    head_size: int  # arrow
+    alpha: int
+    rotation: float
+    anchor_v: Literal["top", "middle", "bottom"]
+    anchor_h: Literal["left", "center", "right"]
+
+
 class LayerCfg(TypedDict, total=False):
     id: str
     order: int
@@ -71,7 +113,7 @@ class LayerCfg(TypedDict, total=False):
 
 class Config(TypedDict, total=False):
     version: str
-    output: OutputCfg
+    output: OutputCfg | List[OutputCfg]
     canvas: CanvasCfg
     assets: AssetsCfg
     elements: List[Dict[str, Any]]
@@ -0,0 +1,168 @@
+"""Config loading and validation.
+
+Importing this module does not import Pillow, so configs can be checked
+quickly by linters and pre-commit hooks (see ``drawtool validate``).
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+from drawtool.encoding import output_settings
+
+
+# Shapes sized by width/height and placed by their anchor, and shapes given by points relative to (x, y)
+BOX_SHAPES = ("rect", "rounded_rect", "ellipse")
+LINE_SHAPES = ("line", "polyline", "arrow")
+
+# Sides of an image crop, each trimmed by a length in source pixels
+CROP_SIDES = ("left", "top", "right", "bottom")
+
+# Glow blur modes: "gaussian" matches Pillow's GaussianBlur, "box" is a single
+# BoxBlur pass with the same standard deviation (cheaper, flatter falloff)
+GLOW_MODES = ("gaussian", "box")
+
+
+def load_config(config_path: str | Path) -> Dict[str, Any]:
+    """Read a JSON config file."""
+    config_path = Path(config_path)
+    if not config_path.exists():
+        raise FileNotFoundError(f"Config not found: {config_path}")
+    with config_path.open("r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def validate_config(cfg: Dict[str, Any]) -> None:
+    """Raise ValueError if cfg is not a valid config."""
+    if "canvas" not in cfg:
+        raise ValueError("Missing required key: canvas")
+    for k in ("width", "height", "background"):
+        if k not in cfg["canvas"]:
+            raise ValueError(f"Missing required key: canvas.{k}")
+
+    w, h = cfg["canvas"]["width"], cfg["canvas"]["height"]
+    if not (isinstance(w, int) and w > 0 and isinstance(h, int) and h > 0):
+        raise ValueError("canvas.width/height must be positive integers")
+
+    if "output" in cfg:
+        validate_output(cfg["output"])
+
+    # Check for either 'elements' or 'layers'
+    has_elements = "elements" in cfg and isinstance(cfg["elements"], list)
+    has_layers = "layers" in cfg and isinstance(cfg["layers"], list)
+
+    if not has_elements and not has_layers:
+        raise ValueError("Missing required key: elements or layers (list)")
+
+    # Validate elements if present
+    if has_elements:
+        for i, el in enumerate(cfg["elements"]):
+            validate_element(el, i, "elements")
+
+    # Validate layers if present
+    if has_layers:
+        for layer_idx, layer in enumerate(cfg["layers"]):
+            if "elements" not in layer or not isinstance(layer["elements"], list):
+                raise ValueError(f"layers[{layer_idx}] missing elements (list)")
+            for el_idx, el in enumerate(layer["elements"]):
+                validate_element(el, el_idx, f"layers[{layer_idx}].elements")
+
+
+def validate_element(el: Dict[str, Any], idx: int, path: str) -> None:
+    """Validate a single element."""
+    if "type" not in el:
+        raise ValueError(f"{path}[{idx}] missing type")
+    if "x" not in el or "y" not in el:
+        raise ValueError(f"{path}[{idx}] missing x/y")
+    if el["type"] == "image":
+        if "path" not in el:
+            raise ValueError(f"{path}[{idx}] image missing path")
+        if "scale" in el and (not isinstance(el["scale"], (int, float)) or el["scale"] <= 0):
+            raise ValueError(f"{path}[{idx}] image scale must be > 0")
+        if "crop" in el:
+            validate_crop(el["crop"], f"{path}[{idx}]")
+    if el["type"] == "text":
+        if "text" not in el:
+            raise ValueError(f"{path}[{idx}] text missing text")
+        validate_text(el, f"{path}[{idx}]")
+    if el["type"] == "shape":
+        validate_shape(el, f"{path}[{idx}]")
+
+
+def validate_crop(crop: Any, where: str) -> None:
+    """Validate an image crop: non-negative trim lengths per side (the image size is checked when rendering)."""
+    if not isinstance(crop, dict) or not set(crop) <= set(CROP_SIDES):
+        raise ValueError(f"{where} image crop must be an object with {', '.join(CROP_SIDES)}")
+    for k, v in crop.items():
+        if isinstance(v, bool) or not isinstance(v, int) or v < 0:
+            raise ValueError(f"{where} image crop.{k} must be an integer >= 0")
+
+
+def validate_text(el: Dict[str, Any], where: str) -> None:
+    """Validate the style of a text element that rendering would otherwise reject."""
+    font = el.get("font", {})
+    glow = font.get("glow") if isinstance(font, dict) else None
+    if isinstance(glow, dict) and glow.get("mode", "gaussian") not in GLOW_MODES:
+        raise ValueError(f"{where} font.glow.mode must be one of {', '.join(GLOW_MODES)}")
+
+
+def validate_shape(el: Dict[str, Any], where: str) -> None:
+    """Validate the geometry of a shape element."""
+    shape = el.get("shape")
+    if shape not in BOX_SHAPES + LINE_SHAPES:
+        raise ValueError(f"{where} shape must be one of {', '.join(BOX_SHAPES + LINE_SHAPES)}")
+    if shape in BOX_SHAPES:
+        for k in ("width", "height"):
+            v = el.get(k)
+            if isinstance(v, bool) or not isinstance(v, (int, float)) or v <= 0:
+                raise ValueError(f"{where} {shape} {k} must be > 0")
+    else:
+        points = el.get("points")
+        if not isinstance(points, list) or len(points) < 2 or not all(
+                isinstance(p, (list, tuple)) and len(p) == 2
+                and all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in p) for p in points):
+            raise ValueError(f"{where} {shape} points must be a list of at least two [dx, dy] pairs")
+        if shape == "line" and len(points) != 2:
+            raise ValueError(f"{where} line takes exactly two points (use polyline)")
+    for k in ("stroke_width", "radius", "head_size"):
+        v = el.get(k, 0)
+        if isinstance(v, bool) or not isinstance(v, (int, float)) or v < 0:
+            raise ValueError(f"{where} {k} must be >= 0")
+
+
+def validate_output(output: Any) -> None:
+    """Validate the output section: one target object or a non-empty list of them."""
+    if isinstance(output, dict):
+        validate_target(output, "output")
+        return
+    if not isinstance(output, list) or not output:
+        raise ValueError("output must be an object or a non-empty list of targets")
+    for i, spec in enumerate(output):
+        if not isinstance(spec, dict) or "path" not in spec:
+            raise ValueError(f"output[{i}] must be an object with a path")
+        validate_target(spec, f"output[{i}]")
+
+
+def validate_target(spec: Dict[str, Any], where: str) -> None:
+    """Validate one output target: its scale, region and encoding settings."""
+    scale = spec.get("scale", 1.0)
+    if isinstance(scale, bool) or not isinstance(scale, (int, float)) or not 0 < scale <= 1:
+        raise ValueError(f"{where}.scale must be in (0, 1]")
+    if spec.get("region") is not None:
+        region = spec["region"]
+        if not isinstance(region, (list, tuple)):
+            raise ValueError(f"{where}.region must be [x0, y0, x1, y1]")
+        validate_region(tuple(region))
+    output_settings(spec)
+
+
+def validate_region(region: Tuple[int, int, int, int]) -> Tuple[int, int, int, int]:
+    """Check a canvas region (x0, y0, x1, y1) and return it as a tuple."""
+    if len(region) != 4 or not all(isinstance(v, int) for v in region):
+        raise ValueError("region must be (x0, y0, x1, y1) integers")
+    x0, y0, x1, y1 = region
+    if x1 <= x0 or y1 <= y0:
+        raise ValueError("region must satisfy x0 < x1 and y0 < y1")
+    return (x0, y0, x1, y1)
@@ -0,0 +1,156 @@
+"""Re-render figures whenever their config, image assets or fonts change."""
+
+from __future__ import annotations
+
+import os
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from drawtool.batch import RenderResult, expand_config_paths, render_result
+
+if TYPE_CHECKING:
+    from drawtool.renderer import FigureRenderer
+
+
+# Seconds between checks of the watched files
+WATCH_INTERVAL = 0.25
+
+# Seconds the watched files must stay unchanged before re-rendering, since
+# editors and image tools often write a file in several steps
+WATCH_DEBOUNCE = 0.3
+
+# (mtime_ns, size) of a watched file, or None while it does not exist
+Stamp = Optional[Tuple[int, int]]
+
+
+class Watcher:
+    """Render configs, then re-render each one when a file it depends on changes.
+
+    Each config keeps one FigureRenderer for the life of the watcher, in one
+    process, so decoded and transformed assets, text masks and fonts stay
+    cached: a re-render still composites every element, but only decodes and
+    resamples the images whose files or settings changed. Layered configs
+    also resume from the snapshot of the last unchanged layer, for layers
+    slow enough to be snapshotted (LAYER_SNAPSHOT_MIN_SECONDS). A config is watched
+    together with the image and font files its last render read; that list is
+    refreshed after every render. A config that fails to load or render is
+    reported and retried on its next change.
+
+    Usage::
+
+        watcher = Watcher(["figures/*.json"], on_result=print)
+        watcher.run()  # until KeyboardInterrupt
+    """
+
+    def __init__(self, configs: Iterable[str | Path], interval: float = WATCH_INTERVAL,
+                 debounce: float = WATCH_DEBOUNCE, on_result: Callable[[RenderResult], None] | None = None,
+                 prefetch_workers: int | None = None, **render_options: Any) -> None:
+        if interval <= 0 or debounce < 0:
+            raise ValueError("interval must be > 0 and debounce >= 0")
+        # Glob patterns are expanded once, when the watcher starts
+        self.paths = expand_config_paths(configs)
+        self.interval = interval
+        self.debounce = debounce
+        self.on_result = on_result
+        self.prefetch_workers = prefetch_workers
+        # Passed to every FigureRenderer.render() call (e.g. profile, output_options)
+        self.render_options = render_options
+        self._renderers: Dict[Path, FigureRenderer] = {}
+        # Per config: stamps of its watched files when it was last rendered
+        self._rendered: Dict[Path, Dict[Path, Stamp]] = {}
+        # Per config: stamps seen by the last poll() while they differ from _rendered, and since when
+        self._changing: Dict[Path, Tuple[Dict[Path, Stamp], float]] = {}
+
+    def render_all(self, force: bool = False) -> List[RenderResult]:
+        """Render every config (skipping those that are up to date unless force)."""
+        return [self.render(path, force) for path in self.paths]
+
+    def render(self, config_path: Path, force: bool = False) -> RenderResult:
+        """Render one watched config with its long-lived renderer."""
+        from drawtool.renderer import FigureRenderer
+
+        start = time.perf_counter()
+        renderer = self._renderers.get(config_path)
+        if renderer is None:
+            try:
+                if self.prefetch_workers is None:
+                    renderer = FigureRenderer(config_path)
+                else:
+                    renderer = FigureRenderer(config_path, prefetch_workers=self.prefetch_workers)
+            except Exception as e:
+                result = RenderResult(config_path, seconds=time.perf_counter() - start,
+                                      error=f"{type(e).__name__}: {e}")
+                self._rendered[config_path] = {config_path: _stamp(config_path)}
+                self._report(result)
+                return result
+            self._renderers[config_path] = renderer
+
+        previous = self._rendered.get(config_path)
+        stamps = self._stamps(config_path)
+        if previous is not None:
+            self._forget_changed_fonts(previous, stamps)
+        result = render_result(renderer, start, force=force, **self.render_options)
+        # The config may now reference other files; stamps taken before rendering
+        # are kept for files watched already, so edits made during the render are seen
+        self._rendered[config_path] = {f: stamps.get(f, stamp) for f, stamp in self._stamps(config_path).items()}
+        self._changing.pop(config_path, None)
+        self._report(result)
+        return result
+
+    def poll(self) -> List[RenderResult]:
+        """Check the watched files once; re-render configs whose files changed and have since settled."""
+        now = time.monotonic()
+        results: List[RenderResult] = []
+        for path in self.paths:
+            rendered = self._rendered.get(path)
+            if rendered is None:
+                results.append(self.render(path))
+                continue
+            current = {f: _stamp(f) for f in rendered}
+            if current == rendered:
+                self._changing.pop(path, None)
+                continue
+            seen = self._changing.get(path)
+            if seen is None or seen[0] != current:
+                # Still being written: wait until it stops changing for debounce seconds
+                self._changing[path] = (current, now)
+            elif now - seen[1] >= self.debounce:
+                results.append(self.render(path))
+        return results
+
+    def run(self, force: bool = False, stop: Callable[[], bool] | None = None) -> None:
+        """Render every config, then poll every interval seconds until stop() returns true (or forever)."""
+        self.render_all(force)
+        while stop is None or not stop():
+            time.sleep(self.interval)
+            self.poll()
+
+    def watched_files(self, config_path: Path) -> List[Path]:
+        """The config file plus the asset and font files its last render read."""
+        return list(self._rendered.get(config_path, {config_path: None}))
+
+    def _stamps(self, config_path: Path) -> Dict[Path, Stamp]:
+        renderer = self._renderers.get(config_path)
+        files = [config_path] + (renderer.last_inputs if renderer is not None else [])
+        return {f: _stamp(f) for f in files}
+
+    @staticmethod
+    def _forget_changed_fonts(previous: Dict[Path, Stamp], current: Dict[Path, Stamp]) -> None:
+        # Loaded fonts are cached by file path, so an edited font file must be reloaded
+        from drawtool.fonts import FONT_SUFFIXES, clear_font_cache
+
+        if any(f.suffix.lower() in FONT_SUFFIXES and current.get(f) != stamp for f, stamp in previous.items()):
+            clear_font_cache()
+
+    def _report(self, result: RenderResult) -> None:
+        if self.on_result is not None:
+            self.on_result(result)
+
+
+def _stamp(path: Path) -> Stamp:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)